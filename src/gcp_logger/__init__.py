@@ -1,13 +1,18 @@
 # File: gcp_logger/__init__.py
 
-from .async_uploader import AsyncUploader
 from .colored_formatter import ColoredFormatter
 from .context_aware_logger import ContextAwareLogger
-from .custom_logging_handler import CustomCloudLoggingHandler
 from .levels import ALERT, EMERGENCY, NOTICE
 from .logger import GCPLogger
 from .logger_adapter import GCPLoggerAdapter
 
+# The Google Cloud backed classes are imported on first access, so local development
+# does not load google-cloud-logging or gcloud-aio-storage at import time.
+_LAZY_IMPORTS = {
+    "AsyncUploader": ".async_uploader",
+    "CustomCloudLoggingHandler": ".custom_logging_handler",
+}
+
 __all__ = [
     "AsyncUploader",
     "CustomCloudLoggingHandler",
@@ -19,3 +24,13 @@ __all__ = [
     "ALERT",
     "EMERGENCY",
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        from importlib import import_module
+
+        value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,9 @@
 # File: gcp_logger/async_uploader.py
 
 import asyncio
+import concurrent.futures
 import threading
+from typing import Dict, Optional
 
 from gcloud.aio.storage import Storage
 from google.api_core import exceptions as google_exceptions
@@ -9,16 +11,49 @@ from google.api_core import exceptions as google_exceptions
 from .internal_logger import internal_debug
 
 
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Creates the event loop for the upload thread, using uvloop when it is installed.
+
+    Returns:
+        asyncio.AbstractEventLoop: A new event loop.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.new_event_loop()
+    return uvloop.new_event_loop()
+
+
 class AsyncUploader:
-    def __init__(self, bucket_name: str):
+    SHUTDOWN_TIMEOUT = 5  # Seconds
+
+    def __init__(
+        self,
+        bucket_name: str,
+        max_concurrent_uploads: int = 8,
+        compress: bool = True,
+        max_pending_uploads: int = 100,
+    ):
         """
         Initializes the AsyncUploader with the specified GCS bucket.
 
         Args:
             bucket_name (str): The name of the Google Cloud Storage bucket.
+            max_concurrent_uploads (int): The maximum number of uploads in flight at once.
+            compress (bool): Whether to store objects gzip-encoded. GCS transcodes them back
+                             to plain text on download, so object names stay unchanged.
+            max_pending_uploads (int): The maximum number of scheduled uploads held in memory;
+                                       further uploads are refused until some complete.
         """
         self.bucket_name = bucket_name
-        self.loop = asyncio.new_event_loop()
+        self.compress = compress
+        self.max_pending_uploads = max_pending_uploads
+        self._upload_semaphore = asyncio.Semaphore(max_concurrent_uploads)
+        self._pending_uploads = set()
+        # Guards _pending_uploads, done callbacks discard from it on the loop thread
+        self._pending_lock = threading.Lock()
+        self.loop = new_event_loop()
         self.loop_thread = threading.Thread(target=self._run_loop, daemon=True)
         self.loop_thread.start()
         self.storage_client = None  # Will be initialized asynchronously
@@ -42,39 +77,65 @@ class AsyncUploader:
             except Exception as e:
                 internal_debug(f"AsyncUploader: Failed to initialize Storage client: {e}")
 
-    def upload_data(self, data: bytes, object_name: str):
+    def upload_data(self, data: bytes, object_name: str, metadata: Optional[Dict[str, str]] = None):
         """
         Schedules the asynchronous upload of data to GCS.
 
         Args:
             data (bytes): The data to upload.
             object_name (str): The name of the object in GCS.
+            metadata (Dict[str, str], optional): Custom metadata to store on the object.
+
+        Returns:
+            Optional[concurrent.futures.Future]: The scheduled upload, or None if too many are pending.
         """
-        future = asyncio.run_coroutine_threadsafe(self._async_upload(data, object_name), self.loop)
-        internal_debug(f"AsyncUploader: Scheduled upload for object {object_name}")
+        with self._pending_lock:
+            if len(self._pending_uploads) >= self.max_pending_uploads:
+                internal_debug(
+                    "AsyncUploader: {} uploads pending, refusing {}", len(self._pending_uploads), object_name
+                )
+                return None
+            future = asyncio.run_coroutine_threadsafe(self._async_upload(data, object_name, metadata), self.loop)
+            self._pending_uploads.add(future)
+        # Outside the lock, the callback runs right away in this thread if the upload already finished
+        future.add_done_callback(self._discard_pending_upload)
+        internal_debug("AsyncUploader: Scheduled upload for object {}", object_name)
         return future
 
-    async def _async_upload(self, data: bytes, object_name: str):
+    def _discard_pending_upload(self, future: concurrent.futures.Future):
+        """
+        Forgets a finished upload.
+
+        Args:
+            future (concurrent.futures.Future): The finished upload.
+        """
+        with self._pending_lock:
+            self._pending_uploads.discard(future)
+
+    async def _async_upload(self, data: bytes, object_name: str, metadata: Optional[Dict[str, str]] = None):
         """
         Asynchronously uploads data to GCS.
 
         Args:
             data (bytes): The data to upload.
             object_name (str): The name of the object in GCS.
+            metadata (Dict[str, str], optional): Custom metadata to store on the object.
         """
         try:
             # Initialize the storage client if not already done
             await self._initialize_storage_client()
 
             # Upload the data to the specified bucket and object name
-            await self.storage_client.upload(
-                bucket=self.bucket_name,
-                object_name=object_name,
-                file_data=data,
-                # Optionally, you can set additional parameters like content_type
-                # content_type='text/plain'
-            )
-            internal_debug(f"AsyncUploader: Successfully uploaded {object_name} to bucket {self.bucket_name}")
+            async with self._upload_semaphore:
+                await self.storage_client.upload(
+                    bucket=self.bucket_name,
+                    object_name=object_name,
+                    file_data=data,
+                    content_type="text/plain; charset=utf-8",
+                    zipped=self.compress,
+                    metadata={"metadata": metadata} if metadata else None,
+                )
+            internal_debug("AsyncUploader: Successfully uploaded {} to bucket {}", object_name, self.bucket_name)
         except google_exceptions.GoogleAPICallError as e:
             internal_debug(
                 f"AsyncUploader: Google API call failed while uploading {object_name} to bucket {self.bucket_name}: {e}"
@@ -86,12 +147,18 @@ class AsyncUploader:
 
     def shutdown(self):
         """
-        Gracefully shuts down the event loop and background thread.
+        Gracefully shuts down the event loop and background thread, waiting for pending uploads.
         """
+        with self._pending_lock:
+            pending = list(self._pending_uploads)
+        if pending:
+            internal_debug(f"AsyncUploader: Waiting for {len(pending)} pending uploads")
+            concurrent.futures.wait(pending, timeout=self.SHUTDOWN_TIMEOUT)
+
         if self.storage_client:
             future = asyncio.run_coroutine_threadsafe(self.storage_client.close(), self.loop)
             try:
-                future.result(timeout=5)
+                future.result(timeout=self.SHUTDOWN_TIMEOUT)
                 internal_debug("AsyncUploader: Storage client closed.")
             except Exception as e:
                 internal_debug(f"AsyncUploader: Error closing storage client: {e}")
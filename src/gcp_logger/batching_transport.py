@@ -0,0 +1,204 @@
+# File: gcp_logger/batching_transport.py
+
+import itertools
+import queue
+import time
+from typing import Optional
+
+from google.cloud.logging_v2.handlers.transports.background_thread import (
+    _WORKER_TERMINATOR,
+    _get_many,
+    _Worker,
+)
+from google.cloud.logging_v2.handlers.transports.base import Transport
+from google.cloud.logging_v2.logger import _GLOBAL_RESOURCE
+
+from .internal_logger import internal_debug
+
+
+def _message_size(message) -> int:
+    """
+    Returns the UTF-8 size of a message, counted on the worker thread rather than the caller's.
+    ASCII messages are measured by length without being encoded.
+    """
+    if isinstance(message, str):
+        return len(message) if message.isascii() else len(message.encode("utf-8"))
+    return len(str(message))
+
+
+class _RingQueue(queue.Queue):
+    """
+    Queue holding at most `capacity` entries that evicts the oldest entry instead of
+    blocking or rejecting new ones, so a stalled network cannot grow memory without bound.
+    """
+
+    def __init__(self, capacity: int):
+        super().__init__()
+        self.capacity = capacity
+        self.dropped_count = 0
+
+    def _put(self, item):
+        # Called with self.mutex held. The worker terminator is never evicted.
+        if len(self.queue) >= self.capacity and self.queue[0] is not _WORKER_TERMINATOR:
+            self.queue.popleft()
+            self.unfinished_tasks -= 1
+            self.dropped_count += 1
+        self.queue.append(item)
+
+
+class _BoundedWorker(_Worker):
+    """
+    Background worker whose queue keeps the newest `max_queue_size` entries and whose
+    batches are committed early once their messages reach `max_batch_bytes`.
+    """
+
+    def __init__(self, cloud_logger, *, max_queue_size: int, max_batch_bytes: int, **kwargs):
+        super().__init__(cloud_logger, **kwargs)
+        self._queue = _RingQueue(max_queue_size)
+        self._max_batch_bytes = max_batch_bytes
+
+    @property
+    def dropped_count(self) -> int:
+        return self._queue.dropped_count
+
+    def flush(self, timeout: Optional[float] = None):
+        """
+        Waits until every queued entry has been written, or at most `timeout` seconds.
+        Unlike Queue.join(), a stalled write cannot block the caller indefinitely.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    internal_debug(f"BatchingTransport: Flush timed out with {self._queue.unfinished_tasks} pending")
+                    return
+                self._queue.all_tasks_done.wait(remaining)
+
+    def _thread_main(self):
+        """
+        Pulls pending entries off the queue and writes them in batches, splitting a batch
+        whenever the next message would push it past `max_batch_bytes`.
+        """
+        done = False
+        while not done:
+            items = _get_many(self._queue, max_items=self._max_batch_size, max_latency=self._max_latency)
+            batch = self._cloud_logger.batch()
+            batch_bytes = 0
+            for item in items:
+                if item is _WORKER_TERMINATOR:
+                    done = True  # Keep writing the entries queued before it
+                    continue
+                size = _message_size(item["message"])
+                if batch_bytes and batch_bytes + size > self._max_batch_bytes:
+                    self._safely_commit_batch(batch)
+                    batch = self._cloud_logger.batch()
+                    batch_bytes = 0
+                batch.log(**item)
+                batch_bytes += size
+
+            self._safely_commit_batch(batch)
+
+            for _ in items:
+                self._queue.task_done()
+
+
+class BatchingTransport(Transport):
+    """
+    Transport that batches log entries into a single `entries.write` call per flush,
+    keeping the network round-trip off the caller's thread.
+
+    Entries are spread over `pool_size` workers so several batches can be in flight
+    at once over the client's gRPC channel.
+    """
+
+    DEFAULT_BATCH_SIZE = 500
+    DEFAULT_MAX_LATENCY = 0.1  # Seconds
+    DEFAULT_MAX_QUEUE_SIZE = 20000
+    DEFAULT_MAX_BATCH_BYTES = 4 * 1024 * 1024  # UTF-8 bytes, well below the 10MB entries.write request limit
+
+    def __init__(
+        self,
+        client,
+        name: str,
+        *,
+        grace_period: float = 5.0,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_latency: float = DEFAULT_MAX_LATENCY,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+        pool_size: int = 1,
+        resource=_GLOBAL_RESOURCE,
+        **kwargs,
+    ):
+        """
+        Initializes the BatchingTransport.
+
+        Args:
+            client (cloud_logging.Client): The Google Cloud Logging client.
+            name (str): The name of the Cloud Logging log.
+            grace_period (float): Seconds to wait for pending entries at process exit.
+            batch_size (int): The maximum number of entries sent in a single write.
+            max_latency (float): Seconds to wait for more entries before sending a batch.
+            max_queue_size (int): The maximum number of pending entries, split evenly across the
+                                  workers; the oldest are dropped beyond it.
+            max_batch_bytes (int): The approximate maximum size of the messages sent in a single write.
+            pool_size (int): The number of workers writing batches concurrently.
+            resource (Resource, optional): The default monitored resource for the entries.
+        """
+        self.client = client
+        self.grace_period = grace_period
+        cloud_logger = self.client.logger(name, resource=resource)
+        pool_size = max(1, pool_size)
+        self.workers = [
+            _BoundedWorker(
+                cloud_logger,
+                grace_period=grace_period,
+                max_batch_size=batch_size,
+                max_latency=max_latency,
+                max_queue_size=max(1, max_queue_size // pool_size),
+                max_batch_bytes=max_batch_bytes,
+            )
+            for _ in range(pool_size)
+        ]
+        for worker in self.workers:
+            worker.start()
+        self._next_worker = itertools.cycle(self.workers).__next__
+        internal_debug(
+            f"BatchingTransport: Initialized with batch_size={batch_size}, max_latency={max_latency}, "
+            f"max_queue_size={max_queue_size}, max_batch_bytes={max_batch_bytes}, pool_size={pool_size}"
+        )
+
+    @property
+    def dropped_count(self) -> int:
+        """
+        Returns the number of pending log entries evicted because the queue was full.
+        """
+        return sum(worker.dropped_count for worker in self.workers)
+
+    def send(self, record, message, **kwargs):
+        """
+        Queues a log entry on the next worker in the pool.
+        """
+        self._next_worker().enqueue(record, message, **kwargs)
+
+    def flush(self):
+        """
+        Blocks until every queued entry has been written, giving the workers at most
+        `grace_period` seconds in total like close(). Stopped workers are skipped,
+        their remaining entries may never be written.
+        """
+        deadline = time.monotonic() + self.grace_period
+        for worker in self.workers:
+            if worker.is_alive:
+                worker.flush(timeout=max(0.0, deadline - time.monotonic()))
+
+    def close(self):
+        """
+        Stops the background workers, giving them at most `grace_period` seconds in total
+        to write the entries still queued so a stalled write cannot hang the process exit.
+        """
+        deadline = time.monotonic() + self.grace_period
+        for worker in self.workers:
+            # stop() queues the terminator behind the pending entries and waits for the worker
+            worker.stop(grace_period=max(0.0, deadline - time.monotonic()))
@@ -1,14 +1,42 @@
 # File: gcp_logger/formatter.py
 
 import logging
-import os
+import sys
+import time
 from functools import lru_cache
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
 from .levels import ALERT, EMERGENCY, NOTICE
-
-# Lazy import of colorama
-colorama = None
+from .utils import get_short_filename
+
+# ANSI escape codes, identical to colorama's Fore/Style constants
+GREEN = "\033[32m"
+CYAN = "\033[36m"
+BLUE = "\033[34m"
+YELLOW = "\033[33m"
+RED = "\033[31m"
+BRIGHT = "\033[1m"
+RESET = "\033[0m"
+
+COLOR_CODES: Dict[int, str] = {
+    logging.DEBUG: CYAN,
+    logging.INFO: GREEN,
+    NOTICE: BLUE,
+    logging.WARNING: YELLOW,
+    logging.ERROR: RED,
+    logging.CRITICAL: RED + BRIGHT,
+    ALERT: YELLOW + BRIGHT,
+    EMERGENCY: RED + BRIGHT,
+}
+DEFAULT_COLOR = COLOR_CODES[logging.DEBUG]
+
+
+@lru_cache(maxsize=None)
+def _init_colorama():
+    # Only import colorama and wrap stdout/stderr once colored output is actually in use
+    import colorama
+
+    colorama.init(autoreset=True)
 
 
 class ColoredFormatter(logging.Formatter):
@@ -16,61 +44,117 @@ class ColoredFormatter(logging.Formatter):
     Formatter for local development that adds color to log outputs.
     """
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.color_codes = self._generate_color_codes()
-
-    @staticmethod
-    @lru_cache(maxsize=None)
-    def _generate_color_codes() -> Dict[int, str]:
-        global colorama
-        if colorama is None:
-            import colorama
-
-            colorama.init(autoreset=True)
-
-        return {
-            logging.DEBUG: colorama.Fore.CYAN,
-            logging.INFO: colorama.Fore.GREEN,
-            NOTICE: colorama.Fore.BLUE,
-            logging.WARNING: colorama.Fore.YELLOW,
-            logging.ERROR: colorama.Fore.RED,
-            logging.CRITICAL: colorama.Fore.RED + colorama.Style.BRIGHT,
-            ALERT: colorama.Fore.YELLOW + colorama.Style.BRIGHT,
-            EMERGENCY: colorama.Fore.RED + colorama.Style.BRIGHT,
-        }
+    color_codes = COLOR_CODES
 
-    def format(self, record: logging.LogRecord) -> str:
+    def __init__(self, *args, use_colors: Optional[bool] = None, **kwargs):
         """
-        Formats the log record with colors.
+        Initializes the ColoredFormatter.
 
         Args:
-            record (logging.LogRecord): The log record to format.
+            use_colors (bool, optional): Whether to add ANSI color codes. Defaults to
+                                         whether stderr, where StreamHandler writes, is a terminal.
+        """
+        super().__init__(*args, **kwargs)
+        if use_colors is None:
+            use_colors = sys.stderr.isatty()
+        self.use_colors = use_colors
+        if use_colors:
+            _init_colorama()
+            self._green, self._cyan, self._reset = GREEN, CYAN, RESET
+        else:
+            self._green = self._cyan = self._reset = ""
+        self._level_styles: Dict[Tuple[int, str], Tuple[str, str]] = {}
+        for levelno in COLOR_CODES:
+            self._get_level_style(levelno, logging.getLevelName(levelno))
+        self._last_time: Tuple[Tuple[int, Optional[str]], str] = ((-1, None), "")
+
+    def _get_level_style(self, levelno: int, levelname: str) -> Tuple[str, str]:
+        """
+        Returns the color code and the padded, colored level name for a level.
+
+        Args:
+            levelno (int): The numeric log level.
+            levelname (str): The name of the log level.
 
         Returns:
-            str: The formatted log message with ANSI color codes.
+            tuple: (color_code, formatted_level)
+        """
+        key = (levelno, levelname)
+        style = self._level_styles.get(key)
+        if style is None:
+            color_code = COLOR_CODES.get(levelno, DEFAULT_COLOR) if self.use_colors else ""
+            style = self._level_styles[key] = (color_code, f"{color_code}{levelname:<10}{self._reset}")
+        return style
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
         """
-        color_code = self.color_codes.get(record.levelno, self.color_codes[logging.DEBUG])
-        reset = colorama.Style.RESET_ALL
+        Formats the creation time of the record. Records logged within the same second
+        reuse the formatted seconds instead of converting and formatting them again.
 
-        formatted_time = colorama.Fore.GREEN + self.formatTime(record, self.datefmt) + reset
-        formatted_level = color_code + f"{record.levelname:<10}" + reset
+        Args:
+            record (logging.LogRecord): The log record.
+            datefmt (str, optional): The time.strftime format string.
 
-        # Use the custom fields from record
-        func = getattr(record, "custom_func", record.funcName)
-        filename = os.path.basename(getattr(record, "custom_filename", record.filename)).split(".")[0]
-        lineno = getattr(record, "custom_lineno", record.lineno)
+        Returns:
+            str: The formatted time.
+        """
+        key = (int(record.created), datefmt)
+        cached_key, formatted = self._last_time
+        if cached_key != key:
+            formatted = time.strftime(datefmt or self.default_time_format, self.converter(record.created))
+            self._last_time = (key, formatted)
+        if datefmt is None and self.default_msec_format:
+            return self.default_msec_format % (formatted, record.msecs)
+        return formatted
 
-        formatted_name = colorama.Fore.CYAN + f"{filename}:{func}:{lineno}" + reset
-        formatted_message = color_code + record.getMessage() + reset
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Formats the log record with colors.
 
-        # Access extra info from record.__dict__
-        trace_id = record.__dict__.get("trace_id", "-")
+        Args:
+            record (logging.LogRecord): The log record to format.
 
-        return (
-            f"{formatted_time} | "
-            f"{trace_id} | {record.process} | {record.thread} | "
-            f"{formatted_level} | "
-            f"{formatted_name} - "
-            f"{formatted_message}"
+        Returns:
+            str: The formatted log message, with ANSI color codes when colors are enabled.
+        """
+        # Inline cache hit; only unseen levels pay for the method call
+        style = self._level_styles.get((record.levelno, record.levelname))
+        if style is None:
+            style = self._get_level_style(record.levelno, record.levelname)
+        color_code, formatted_level = style
+
+        try:
+            # Set on every record by ContextAwareLogger.makeRecord
+            trace_id = record.trace_id
+        except AttributeError:
+            trace_id = "-"
+
+        # A single join allocates the result once instead of one temporary per concatenation
+        reset = self._reset
+        return "".join(
+            (
+                self._green,
+                self.formatTime(record, self.datefmt),
+                reset,
+                " | ",
+                str(trace_id),
+                " | ",
+                str(record.process),
+                " | ",
+                str(record.thread),
+                " | ",
+                formatted_level,
+                " | ",
+                self._cyan,
+                get_short_filename(record.filename),
+                ":",
+                str(record.funcName),
+                ":",
+                str(record.lineno),
+                reset,
+                " - ",
+                color_code,
+                record.getMessage(),
+                reset,
+            )
         )
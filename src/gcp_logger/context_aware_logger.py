@@ -1,51 +1,78 @@
 # File: gcp_logger/context_aware_logger.py
 
-import inspect
+import io
 import logging
+import os
+import sys
+import traceback
 
 from .levels import ALERT, EMERGENCY, NOTICE
 
+# Source files whose frames are skipped when looking up the caller
+_LOGGING_FILE = logging.__file__
+# The trailing separator keeps sibling directories such as gcp_logger_ext from matching
+_PACKAGE_PREFIX = os.path.dirname(__file__) + os.sep
+
+
+# Defaults for the context fields the handlers and formatters read from every record
+RECORD_DEFAULTS = {"instance_id": "-", "trace_id": "-", "span_id": "-"}
+
 
 class ContextAwareLogger(logging.Logger):
-    def _log(self, level, msg, args, exc_info=None, extra=None, stack_info=False, stacklevel=1):
+    def makeRecord(self, name, level, fn, lno, msg, args, exc_info, func=None, extra=None, sinfo=None):
+        """
+        Overrides makeRecord to give every record the context fields, unless extra already set them.
+
+        Returns:
+            logging.LogRecord: The created log record.
+        """
+        record = super().makeRecord(name, level, fn, lno, msg, args, exc_info, func, extra, sinfo)
+        if extra is None:
+            record.__dict__.update(RECORD_DEFAULTS)
+        else:
+            record.__dict__.update({key: value for key, value in RECORD_DEFAULTS.items() if key not in extra})
+        return record
+
+    def findCaller(self, stack_info=False, stacklevel=1):
         """
-        Overrides the _log method to inject additional context into log records.
+        Overrides findCaller to report the first frame outside of the logging module
+        and the gcp_logger package, so records carry the caller's file, line and function.
 
         Args:
-            level (int): The log level.
-            msg (str): The log message.
-            args (tuple): Arguments for the log message.
-            exc_info (bool, Exception, tuple): Exception information.
-            extra (dict): Additional context.
-            stack_info (bool): Stack information flag.
-            stacklevel (int): Stack level for caller information.
+            stack_info (bool): Whether to include stack information.
+            stacklevel (int): Number of additional frames to skip past the caller.
+
+        Returns:
+            tuple: (filename, lineno, function name, stack info)
         """
-        # Find the first frame outside of the logging module and gcp_logger package
-        frame = inspect.currentframe()
-        while frame and (
-            frame.f_code.co_filename.endswith("logging/__init__.py") or "gcp_logger" in frame.f_code.co_filename
-        ):
+        frame = sys._getframe(1)
+        while frame:
+            filename = frame.f_code.co_filename
+            if filename != _LOGGING_FILE and not filename.startswith(_PACKAGE_PREFIX):
+                break
+            frame = frame.f_back
+
+        if frame is None:
+            return "(unknown file)", 0, "(unknown function)", None
+
+        for _ in range(stacklevel - 1):
+            if frame.f_back is None:
+                break
             frame = frame.f_back
 
-        if frame:
-            extra = extra or {}
-            extra.update(
-                {
-                    "custom_filename": frame.f_code.co_filename,
-                    "custom_lineno": frame.f_lineno,
-                    "custom_func": frame.f_code.co_name,
-                }
-            )
+        sinfo = None
+        if stack_info:
+            with io.StringIO() as sio:
+                sio.write("Stack (most recent call last):\n")
+                traceback.print_stack(frame, file=sio)
+                sinfo = sio.getvalue().rstrip("\n")
 
-        super()._log(level, msg, args, exc_info, extra, stack_info, stacklevel)
+        return frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name, sinfo
 
     def log(self, level, msg, *args, **kwargs):
         if self.isEnabledFor(level):
-            # Ensure that exc_info, extra, and stack_info are always passed
-            exc_info = kwargs.get("exc_info", None)
-            extra = kwargs.get("extra", None)
-            stack_info = kwargs.get("stack_info", False)
-            self._log(level, msg, args, exc_info, extra, stack_info)
+            # Forward every keyword so stacklevel reaches findCaller as well
+            self._log(level, msg, args, **kwargs)
 
     def notice(self, msg, *args, **kwargs):
         """
@@ -54,7 +81,8 @@ class ContextAwareLogger(logging.Logger):
         Args:
             msg (str): The log message.
         """
-        self.log(NOTICE, msg, *args, **kwargs)
+        if self.isEnabledFor(NOTICE):
+            self._log(NOTICE, msg, args, **kwargs)
 
     def alert(self, msg, *args, **kwargs):
         """
@@ -63,7 +91,8 @@ class ContextAwareLogger(logging.Logger):
         Args:
             msg (str): The log message.
         """
-        self.log(ALERT, msg, *args, **kwargs)
+        if self.isEnabledFor(ALERT):
+            self._log(ALERT, msg, args, **kwargs)
 
     def emergency(self, msg, *args, **kwargs):
         """
@@ -72,7 +101,8 @@ class ContextAwareLogger(logging.Logger):
         Args:
             msg (str): The log message.
         """
-        self.log(EMERGENCY, msg, *args, **kwargs)
+        if self.isEnabledFor(EMERGENCY):
+            self._log(EMERGENCY, msg, args, **kwargs)
 
     def success(self, msg, *args, **kwargs):
         """
@@ -81,4 +111,10 @@ class ContextAwareLogger(logging.Logger):
         Args:
             msg (str): The log message.
         """
-        self.info(f"SUCCESS: {msg}", *args, **kwargs)
+        if not self.isEnabledFor(logging.INFO):
+            return
+        if args:
+            # msg carries its own placeholders, so the prefix has to be joined up front
+            self.info(f"SUCCESS: {msg}", *args, **kwargs)
+        else:
+            self.info("SUCCESS: %s", msg, **kwargs)
@@ -2,35 +2,55 @@
 
 import logging
 import os
-from typing import Any, Dict
+import time
+from functools import partial
+from typing import TYPE_CHECKING, Dict, Optional
 
 from google.cloud import logging as cloud_logging
 from google.cloud.logging_v2._helpers import LogSeverity
 from google.cloud.logging_v2.handlers import CloudLoggingHandler
 
-from .async_uploader import AsyncUploader
+from .batching_transport import BatchingTransport
 from .internal_logger import internal_debug
 from .levels import ALERT, EMERGENCY, NOTICE
+from .utils import get_short_filename
+
+if TYPE_CHECKING:
+    from .async_uploader import AsyncUploader
+
+
+CUSTOM_LOGGING_SEVERITY = {
+    logging.DEBUG: LogSeverity.DEBUG,
+    logging.INFO: LogSeverity.INFO,
+    NOTICE: LogSeverity.NOTICE,
+    logging.WARNING: LogSeverity.WARNING,
+    logging.ERROR: LogSeverity.ERROR,
+    logging.CRITICAL: LogSeverity.CRITICAL,
+    ALERT: LogSeverity.ALERT,
+    EMERGENCY: LogSeverity.EMERGENCY,
+}
+_get_severity = CUSTOM_LOGGING_SEVERITY.get
 
 
 class CustomCloudLoggingHandler(CloudLoggingHandler):
     MAX_LOG_SIZE = 255 * 1024  # 255KB
+    ERROR_REPORT_INTERVAL = 1024  # Report the first emit failure and then every 1024th
+    TRUNCATION_NOTICE = "... [truncated]"
+    TRUNCATION_REFERENCE = "\nMessage has been truncated. Full log at: "
+    TRUNCATION_OVERHEAD = len(TRUNCATION_NOTICE) + len(TRUNCATION_REFERENCE)  # Both are ASCII
 
-    CUSTOM_LOGGING_SEVERITY = {
-        logging.DEBUG: LogSeverity.DEBUG,
-        logging.INFO: LogSeverity.INFO,
-        NOTICE: LogSeverity.NOTICE,
-        logging.WARNING: LogSeverity.WARNING,
-        logging.ERROR: LogSeverity.ERROR,
-        logging.CRITICAL: LogSeverity.CRITICAL,
-        ALERT: LogSeverity.ALERT,
-        EMERGENCY: LogSeverity.EMERGENCY,
-    }
+    CUSTOM_LOGGING_SEVERITY = CUSTOM_LOGGING_SEVERITY
 
     def __init__(
         self,
         client: cloud_logging.Client,
         default_bucket: str = None,
+        batch_size: int = BatchingTransport.DEFAULT_BATCH_SIZE,
+        max_latency: float = BatchingTransport.DEFAULT_MAX_LATENCY,
+        max_queue_size: int = BatchingTransport.DEFAULT_MAX_QUEUE_SIZE,
+        max_batch_bytes: int = BatchingTransport.DEFAULT_MAX_BATCH_BYTES,
+        pool_size: int = 1,
+        async_uploader: Optional["AsyncUploader"] = None,
     ):
         """
         Initializes the CustomCloudLoggingHandler.
@@ -38,17 +58,39 @@ class CustomCloudLoggingHandler(CloudLoggingHandler):
         Args:
             client (cloud_logging.Client): The Google Cloud Logging client.
             default_bucket (str, optional): The default GCS bucket for large logs.
+            batch_size (int): The maximum number of log entries sent per Cloud Logging write.
+            max_latency (float): Seconds to wait for more entries before sending a batch.
+            max_queue_size (int): The maximum number of pending entries; the oldest are dropped beyond it.
+            max_batch_bytes (int): The approximate maximum size of the messages sent in a single write.
+            pool_size (int): The number of concurrent Cloud Logging writers.
+            async_uploader (AsyncUploader, optional): A shared uploader for large logs.
+                                                      Created from default_bucket if not given.
         """
         internal_debug(f"Initializing CustomCloudLoggingHandler: client={client}, default_bucket={default_bucket}")
+        transport = partial(
+            BatchingTransport,
+            batch_size=batch_size,
+            max_latency=max_latency,
+            max_queue_size=max_queue_size,
+            max_batch_bytes=max_batch_bytes,
+            pool_size=pool_size,
+        )
         try:
-            super().__init__(client, name="gcp-logger")
+            super().__init__(client, name="gcp-logger", transport=transport)
             internal_debug("CloudLoggingHandler initialized successfully")
         except Exception as e:
             internal_debug(f"Error initializing CloudLoggingHandler: {str(e)}")
             raise
 
         self.default_bucket = default_bucket
-        self.async_uploader = AsyncUploader(bucket_name=self.default_bucket) if self.default_bucket else None
+        if async_uploader is None and self.default_bucket:
+            # gcloud-aio-storage is only needed when large logs are offloaded
+            from .async_uploader import AsyncUploader
+
+            async_uploader = AsyncUploader(bucket_name=self.default_bucket)
+        self.async_uploader = async_uploader
+        self._labels_by_logger = {}
+        self.emit_error_count = 0
 
     def emit(self, record: logging.LogRecord):
         """
@@ -57,164 +99,184 @@ class CustomCloudLoggingHandler(CloudLoggingHandler):
         Args:
             record (logging.LogRecord): The log record to emit.
         """
-        internal_debug(f"Emitting log: level={record.levelno}, msg={record.getMessage()[:50]}...")
+        # record.msg is the unformatted template, so the arguments are only merged once in format_log_message
+        internal_debug("Emitting log: level={}, msg={!s:.50}...", record.levelno, record.msg)
 
         try:
             self.add_custom_attributes(record)
+            message = self.format_log_message(record)
 
-            if self.is_large_log(record) and self.async_uploader:
-                record = self.handle_large_log(record)
+            if self.async_uploader:
+                encoded = self.encode_large_log(message)
+                if encoded is not None:
+                    message = self.handle_large_log(record, encoded)
 
             internal_debug("Sending log record to Cloud Logging")
-            message = self.format_log_message(record)
 
-            # Ensure we have a valid labels dictionary
-            labels = dict(self.resource.labels) if self.resource.labels else {}
-
-            trace_id = getattr(record, "trace_id")
-            span_id = getattr(record, "span_id")
+            # Set by add_custom_attributes, so plain attribute loads are enough
+            trace_id = record.trace_id
+            span_id = record.span_id
 
             self.transport.send(
                 record,
                 message,
                 resource=self.resource,
-                labels=labels,
+                labels=self._labels_by_logger.get(record.name) or self.get_entry_labels(record.name),
                 trace=trace_id if trace_id != "-" else None,
                 span_id=span_id if span_id != "-" else None,
             )
             internal_debug("Log record sent successfully")
         except Exception as e:
-            internal_debug(f"Error in emit method: {str(e)}")
+            # Counted rather than reported each time, a failing endpoint would flood the debug output.
+            # Handler.handle calls emit with self.lock held, so the increment is not racy.
+            self.emit_error_count += 1
+            if (self.emit_error_count - 1) % self.ERROR_REPORT_INTERVAL == 0:
+                internal_debug("Error in emit method ({} failures so far): {}", self.emit_error_count, e)
 
     def add_custom_attributes(self, record: logging.LogRecord):
         """
-        Adds custom attributes to the log record.
+        Adds custom attributes to the log record. Records from a ContextAwareLogger
+        already carry the trace defaults, the fallbacks cover records from other loggers.
 
         Args:
             record (logging.LogRecord): The log record to process.
         """
-        custom_fields = self.extract_custom_fields(record)
-        for key, value in custom_fields.items():
-            setattr(record, key, value)
-
-    def get_severity(self, level: int) -> LogSeverity:
+        record.instance_id = getattr(record, "instance_id", "-")
+        record.trace_id = getattr(record, "trace_id", "-")
+        record.span_id = getattr(record, "span_id", "-")
+        # A separate field, other handlers on the same logger keep seeing the stock filename
+        record.short_filename = get_short_filename(record.filename)
+        record.severity = self.get_severity(record.levelno)
+
+    def get_entry_labels(self, logger_name: str) -> Dict[str, str]:
         """
-        Maps a logging level to a Google Cloud LogSeverity.
+        Builds the labels sent with entries from the given logger and caches them.
+
+        The background worker sets python_logger on the labels it receives. With that label
+        already in place the write leaves the dict unchanged, so one dict is shared by every
+        entry of the logger instead of copying the resource labels per record.
 
         Args:
-            level (int): The logging level.
+            logger_name (str): The name of the logger that created the record.
 
         Returns:
-            LogSeverity: The corresponding Google Cloud LogSeverity.
+            Dict[str, str]: The labels for the logger's entries.
         """
-        return self.CUSTOM_LOGGING_SEVERITY.get(level, LogSeverity.DEFAULT)
+        labels = dict(self.resource.labels) if self.resource.labels else {}
+        if logger_name:
+            labels["python_logger"] = logger_name
+        self._labels_by_logger[logger_name] = labels
+        return labels
 
-    def extract_custom_fields(self, record: logging.LogRecord) -> Dict[str, Any]:
+    def get_severity(self, level: int) -> LogSeverity:
         """
-        Extracts custom fields from a logging.LogRecord.
+        Maps a logging level to a Google Cloud LogSeverity.
 
         Args:
-            record (logging.LogRecord): The log record to process.
+            level (int): The logging level.
 
         Returns:
-            Dict[str, Any]: A dictionary of custom fields.
+            LogSeverity: The corresponding Google Cloud LogSeverity.
         """
-        return {
-            "instance_id": getattr(record, "instance_id", "-"),
-            "trace_id": getattr(record, "trace_id", "-"),
-            "span_id": getattr(record, "span_id", "-"),
-            "filename": os.path.basename(getattr(record, "custom_filename", record.filename)).split(".")[0],
-            "funcName": getattr(record, "custom_func", record.funcName),
-            "lineno": getattr(record, "custom_lineno", record.lineno),
-            "process": record.process,
-            "thread": record.thread,
-            "levelname": record.levelname,
-            "severity": self.get_severity(record.levelno),
-        }
+        return _get_severity(level, LogSeverity.DEFAULT)
 
-    def is_large_log(self, record: logging.LogRecord) -> bool:
+    def encode_large_log(self, message: str) -> Optional[bytes]:
         """
-        Checks if a log record exceeds the maximum log size.
+        Encodes a log message if it exceeds the maximum log size.
+
+        UTF-8 uses at most 4 bytes per character and exactly one for ASCII, so short
+        or ASCII-only messages are measured without being encoded.
 
         Args:
-            record (logging.LogRecord): The log record to check.
+            message (str): The formatted log message.
 
         Returns:
-            bool: True if the log record is large, False otherwise.
+            Optional[bytes]: The UTF-8 encoded message if it is too large, None otherwise.
         """
-        message = self.format(record)
-        return len(message.encode("utf-8")) > self.MAX_LOG_SIZE
-
-    def handle_large_log(self, record: logging.LogRecord) -> logging.LogRecord:
+        length = len(message)
+        if length * 4 <= self.MAX_LOG_SIZE:
+            return None
+        # str.isascii() is a constant-time flag check in CPython
+        if message.isascii() and length <= self.MAX_LOG_SIZE:
+            return None
+        encoded = message.encode("utf-8")
+        return encoded if len(encoded) > self.MAX_LOG_SIZE else None
+
+    def handle_large_log(self, record: logging.LogRecord, encoded: bytes) -> str:
         """
-        Handles a large log record by uploading it to GCS and truncating the message.
+        Handles a large log message by uploading it to GCS and truncating it.
 
         Args:
-            record (logging.LogRecord): The large log record.
+            record (logging.LogRecord): The log record, carrying the context fields stored with the upload.
+            encoded (bytes): The UTF-8 encoded log message.
 
         Returns:
-            logging.LogRecord: The updated log record with a truncated message.
+            str: The truncated log message.
         """
         internal_debug("Log size exceeds MAX_LOG_SIZE, attempting to upload to GCS")
-        message = self.format_log_message(record)
+        # The blob name is opaque, so the record's context goes into the object metadata
         labels = dict(self.labels) if self.labels else {}
-        gcs_uri = self.upload_large_log_to_gcs(message, labels)
+        labels["instance_id"] = record.instance_id
+        labels["trace_id"] = record.trace_id
+        labels["span_id"] = record.span_id
+        gcs_uri = self.upload_large_log_to_gcs(encoded, labels)
         if gcs_uri:
-            truncated_message = self.truncate_log_message(message, gcs_uri)
-            record.msg = truncated_message
-            internal_debug(f"Log truncated and uploaded to GCS: {gcs_uri}")
+            internal_debug("Log truncated and uploaded to GCS: {}", gcs_uri)
         else:
-            internal_debug("Failed to upload large log to GCS")
-        return record
+            # Still truncate, an oversized entry would be rejected by Cloud Logging
+            internal_debug("Large log was not uploaded to GCS, truncating without a reference")
+        return self.truncate_log_message(encoded, gcs_uri)
 
-    def upload_large_log_to_gcs(self, payload: str, labels: Dict[str, str]) -> str:
+    def upload_large_log_to_gcs(self, payload: bytes, labels: Dict[str, str]) -> Optional[str]:
         """
         Uploads a large log message to GCS.
 
         Args:
-            payload (str): The log message to upload.
+            payload (bytes): The UTF-8 encoded log message to upload.
             labels (Dict[str, str]): Labels associated with the log entry.
 
         Returns:
-            str: The GCS URI of the uploaded log.
+            Optional[str]: The GCS URI of the uploaded log, or None if the uploader refused it.
         """
-        blob_name = self.generate_blob_name(labels)
-        gcs_uri = f"gs://{self.default_bucket}/{blob_name}"
-        self.async_uploader.upload_data(data=payload.encode("utf-8"), object_name=blob_name)
-        return gcs_uri
+        blob_name = self.generate_blob_name()
+        metadata = {key: str(value) for key, value in labels.items() if value and value != "-"}
+        if self.async_uploader.upload_data(data=payload, object_name=blob_name, metadata=metadata) is None:
+            return None
+        return f"gs://{self.default_bucket}/{blob_name}"
 
-    def generate_blob_name(self, labels: Dict[str, str]) -> str:
+    def generate_blob_name(self) -> str:
         """
         Generates a unique blob name for the log message.
 
-        Args:
-            labels (Dict[str, str]): Labels associated with the log entry.
+        The name is the nanosecond timestamp plus a random suffix, so uploads from the same
+        second or from other instances sharing the bucket never overwrite each other. Labels
+        are stored as object metadata instead.
 
         Returns:
             str: The generated blob name.
         """
-        import time
-
-        timestamp = int(time.time())
-        parts = [str(timestamp)] + [str(labels.get(key, "")) for key in ["instance_id", "trace_id", "span_id"]]
-        return f"logs/{'_'.join(filter(bool, parts))}.log"
+        return f"logs/{time.time_ns():016x}{os.urandom(4).hex()}.log"
 
-    def truncate_log_message(self, message: str, gcs_uri: str) -> str:
+    def truncate_log_message(self, encoded: bytes, gcs_uri: Optional[str]) -> str:
         """
-        Truncates the log message and appends a reference to the GCS URI.
+        Truncates the log message and appends a reference to the GCS URI, if any.
 
         Args:
-            message (str): The original log message.
-            gcs_uri (str): The GCS URI where the full log is stored.
+            encoded (bytes): The UTF-8 encoded original log message.
+            gcs_uri (str, optional): The GCS URI where the full log is stored, if it was uploaded.
 
         Returns:
             str: The truncated log message with a reference.
         """
-        truncation_notice = "... [truncated]"
-        additional_text = f"\nMessage has been truncated. Full log at: {gcs_uri}"
-        max_message_length = self.MAX_LOG_SIZE - len(truncation_notice) - len(additional_text)
-        truncated_message = message[:max_message_length]
-        return f"{truncated_message}{truncation_notice}{additional_text}"
+        if gcs_uri is None:
+            max_message_length = self.MAX_LOG_SIZE - len(self.TRUNCATION_NOTICE)
+        else:
+            max_message_length = self.MAX_LOG_SIZE - self.TRUNCATION_OVERHEAD - len(gcs_uri.encode("utf-8"))
+        # Decode straight from a view of the buffer to avoid copying the truncated prefix
+        truncated_message = str(memoryview(encoded)[:max_message_length], "utf-8", "ignore")
+        if gcs_uri is None:
+            return f"{truncated_message}{self.TRUNCATION_NOTICE}"
+        return f"{truncated_message}{self.TRUNCATION_NOTICE}{self.TRUNCATION_REFERENCE}{gcs_uri}"
 
     def format_log_message(self, record: logging.LogRecord) -> str:
         """
@@ -226,19 +288,25 @@ class CustomCloudLoggingHandler(CloudLoggingHandler):
         Returns:
             str: The formatted log message.
         """
-        log_format = (
-            "{instance_id} | {trace_id} | {span_id} | "
-            "{process} | {thread} | "
-            "{levelname:<8} | "
-            "{filename}:{funcName}:{lineno} - "
-            "{message}"
+        return (
+            f"{record.instance_id} | {record.trace_id} | {record.span_id} | "
+            f"{record.process} | {record.thread} | "
+            f"{record.levelname:<8} | "
+            f"{record.short_filename}:{record.funcName}:{record.lineno} - "
+            f"{record.getMessage()}"
         )
 
-        return log_format.format(**record.__dict__)
+    def flush(self):
+        """
+        Sends any log entries still waiting in the batching queue.
+        """
+        super().flush()
+        self.transport.flush()
 
     def shutdown(self):
         """
-        Shuts down the AsyncUploader gracefully.
+        Drains pending log entries and shuts down the AsyncUploader gracefully.
         """
+        self.transport.close()
         if self.async_uploader:
             self.async_uploader.shutdown()
@@ -1,7 +1,7 @@
 # File: gcp_logger/internal_logger.py
 
 import sys
-from datetime import datetime
+import time
 from functools import wraps
 
 
@@ -22,16 +22,20 @@ class InternalLogger:
 
     def debug(self, msg, *args, **kwargs):
         if self.is_debug_enabled:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+            now = time.time()
+            timestamp = f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))}.{int(now % 1 * 1000):03d}"
             formatted_msg = msg.format(*args, **kwargs) if args or kwargs else msg
-            print(f"[{timestamp}] GCPLogger Internal: {formatted_msg}", file=sys.stderr, flush=True)
+            # A single write of the whole line; stderr is line buffered, so no explicit flush is needed
+            sys.stderr.write(f"[{timestamp}] GCPLogger Internal: {formatted_msg}\n")
 
 
 internal_logger = InternalLogger.get_instance()
 
 
 def internal_debug(msg, *args, **kwargs):
-    internal_logger.debug(msg, *args, **kwargs)
+    # Checked here so disabled calls return without another method call
+    if internal_logger.is_debug_enabled:
+        internal_logger.debug(msg, *args, **kwargs)
 
 
 def debug_only(func):
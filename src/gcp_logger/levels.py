@@ -7,7 +7,8 @@ NOTICE = 300
 ALERT = 700
 EMERGENCY = 800
 
-# Add custom levels to the logging module
-logging.addLevelName(NOTICE, "NOTICE")
-logging.addLevelName(ALERT, "ALERT")
-logging.addLevelName(EMERGENCY, "EMERGENCY")
+# Add custom levels to the logging module, unless they are already registered
+for _level, _name in ((NOTICE, "NOTICE"), (ALERT, "ALERT"), (EMERGENCY, "EMERGENCY")):
+    if logging.getLevelName(_level) != _name:
+        logging.addLevelName(_level, _name)
+del _level, _name
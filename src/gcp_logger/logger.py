@@ -1,16 +1,54 @@
+import atexit
 import logging
 import os
 import threading
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Optional
 from uuid import uuid4
 
-from google.cloud import logging as cloud_logging
-
 from .colored_formatter import ColoredFormatter
 from .context_aware_logger import ContextAwareLogger
-from .custom_logging_handler import CustomCloudLoggingHandler
 from .internal_logger import debug_only, internal_debug, internal_logger
-from .logger_adapter import GCPLoggerAdapter
+from .logger_adapter import GCPLoggerAdapter, trace_context
+from .utils import default_pool_size
+
+
+@lru_cache(maxsize=1)
+def _compute_instance_id() -> str:
+    """
+    Computes the instance ID from the environment variables of the serverless platform.
+    They do not change for the lifetime of an instance, so the result is cached.
+    """
+    if gae_instance := os.getenv("GAE_INSTANCE"):
+        return gae_instance[:10]
+    elif k_service := os.getenv("K_SERVICE"):
+        return f"{k_service}-{os.getenv('K_REVISION')}"[:9]
+    elif function_name := os.getenv("FUNCTION_NAME"):
+        return function_name[:10]
+    else:
+        internal_debug("Instance ID not found.")
+        return "-"
+
+
+def parse_trace_header(trace_header: Optional[str] = None) -> tuple:
+    """
+    Extracts trace_id and span_id from an X-Cloud-Trace-Context header ("TRACE_ID/SPAN_ID;o=OPTIONS").
+    If the header is missing or malformed, generates a UUID hex for trace_id.
+
+    Args:
+        trace_header (str, optional): The X-Cloud-Trace-Context header value.
+
+    Returns:
+        tuple: (trace_id, span_id)
+    """
+    if trace_header:
+        # str.partition never raises and measures faster than both split() and a regex match
+        trace_id, _, rest = trace_header.partition("/")
+        span_id = rest.partition(";")[0].partition("/")[0]
+        if trace_id and span_id:
+            return trace_id, span_id
+        internal_debug("Invalid trace header format: {}", trace_header)
+    return uuid4().hex, "-"
 
 
 class GCPLogger:
@@ -19,46 +57,80 @@ class GCPLogger:
     supporting both local development and production environments, with tracing capabilities.
     """
 
-    _instance = None
-    _lock = threading.Lock()
+    DEFAULT_LOGGER_NAME = "gcp-logger"
 
-    def __new__(cls, *args, **kwargs):
-        if not cls._instance:
+    _instances: Dict[str, "GCPLogger"] = {}
+    _default_instance: Optional["GCPLogger"] = None
+    _lock = threading.Lock()
+    _shared_client = None
+
+    def __new__(cls, logger_name: Optional[str] = None, *args, **kwargs):
+        # Without a name, return the first configured instance as the process-wide singleton did
+        if logger_name is None:
+            if cls._default_instance is not None:
+                return cls._default_instance
+            logger_name = cls.DEFAULT_LOGGER_NAME
+        instance = cls._instances.get(logger_name)
+        if instance is None:
             with cls._lock:
-                if not cls._instance:
-                    cls._instance = super(GCPLogger, cls).__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
+                instance = cls._instances.get(logger_name)
+                if instance is None:
+                    instance = super(GCPLogger, cls).__new__(cls)
+                    instance._initialized = False
+                    cls._instances[logger_name] = instance
+                    if cls._default_instance is None:
+                        cls._default_instance = instance
+        return instance
 
     def __init__(
         self,
-        logger_name: str = "gcp-logger",
+        logger_name: Optional[str] = None,
         logger_level: int = logging.DEBUG,
         default_bucket: str = None,
         is_localdev: bool = False,
         debug_logs: bool = False,
+        pool_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_latency: Optional[float] = None,
+        max_queue_size: Optional[int] = None,
+        max_batch_bytes: Optional[int] = None,
     ):
         """
         Initializes the GCPLogger.
 
         Args:
-            logger_name (str, optional): The name of the logger.
+            logger_name (str, optional): The name of the logger. Defaults to "gcp-logger", or returns the
+                                         first created instance if there is one.
             logger_level (int): The logging level.
             default_bucket (str, optional): The default GCS bucket for large logs.
             is_localdev (bool): Whether the environment is local development.
             debug_logs (bool): Whether to enable debug logging.
+            pool_size (int, optional): The number of concurrent Cloud Logging writers.
+                                       Defaults to GCP_LOG_POOL_SIZE, or 1.
+            batch_size (int, optional): The maximum number of log entries sent per Cloud Logging write.
+            max_latency (float, optional): Seconds to wait for more entries before sending a batch.
+            max_queue_size (int, optional): The maximum number of pending entries before the oldest are dropped.
+            max_batch_bytes (int, optional): The approximate maximum size of the messages sent in a single write.
         """
         if self._initialized:
             return
 
         self._init_lock = threading.Lock()
-        self.logger_name = logger_name
+        self.logger_name = logger_name or self.DEFAULT_LOGGER_NAME
         self.logger_level = logger_level
         self.default_bucket = default_bucket
         self.is_localdev = is_localdev
         self.debug_logs = debug_logs
+        self.pool_size = pool_size or default_pool_size()
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.max_queue_size = max_queue_size
+        self.max_batch_bytes = max_batch_bytes
         self._logger = None
         self.logger = None
+        self.client = None
+        self.async_uploader = None
+        self._shutdown_handlers = ()
         self._initialized = False
         self._lazy_init()
 
@@ -72,6 +144,8 @@ class GCPLogger:
         internal_logger.configure(self.debug_logs)
         self._debug_init()
         self._setup_logger()
+        # Drain the batching workers and pending GCS uploads if the process exits without shutdown()
+        atexit.register(self.shutdown)
         self._initialized = True
 
     @debug_only
@@ -83,9 +157,7 @@ class GCPLogger:
     def _setup_logger(self):
         self.instance_id = self.get_instance_id()
 
-        internal_debug(f"Setting up logger class: ContextAwareLogger")
-        logging.setLoggerClass(ContextAwareLogger)
-        self._logger = logging.getLogger(self.logger_name)
+        self._logger = self.get_context_aware_logger(self.logger_name)
         self._logger.setLevel(self.logger_level)
 
         internal_debug("Configuring handlers")
@@ -99,18 +171,64 @@ class GCPLogger:
 
         internal_debug("GCPLogger initialization completed")
 
+    @staticmethod
+    def get_context_aware_logger(logger_name: str) -> logging.Logger:
+        """
+        Retrieves the named logger, creating it as a ContextAwareLogger if it does not exist yet.
+        The global logger class is only swapped while the logger is being created.
+
+        Args:
+            logger_name (str): The name of the logger.
+
+        Returns:
+            logging.Logger: The named logger.
+        """
+        existing = logging.Logger.manager.loggerDict.get(logger_name)
+        if isinstance(existing, ContextAwareLogger):
+            return existing
+
+        internal_debug("Setting up logger class: ContextAwareLogger")
+        original_class = logging.getLoggerClass()
+        logging.setLoggerClass(ContextAwareLogger)
+        try:
+            return logging.getLogger(logger_name)
+        finally:
+            logging.setLoggerClass(original_class)
+
+    @classmethod
+    def get_cloud_logging_client(cls):
+        """
+        Retrieves the Cloud Logging client shared by all GCPLogger instances, creating it on first use.
+        A single client keeps one set of credentials and one gRPC channel per process.
+
+        Returns:
+            cloud_logging.Client: The shared Google Cloud Logging client.
+        """
+        if cls._shared_client is None:
+            with cls._lock:
+                if cls._shared_client is None:
+                    # Deferred so local development never pays for gRPC, protobuf and auth imports
+                    from google.cloud import logging as cloud_logging
+
+                    cls._shared_client = cloud_logging.Client()
+                    internal_debug("Cloud Logging client created")
+        return cls._shared_client
+
     @staticmethod
     def get_instance_id() -> str:
-        """Retrieves the instance ID based on environment variables."""
-        if os.getenv("GAE_INSTANCE"):
-            return os.getenv("GAE_INSTANCE")[:10]
-        elif os.getenv("K_SERVICE"):
-            return f"{os.getenv('K_SERVICE')}-{os.getenv('K_REVISION')}"[:9]
-        elif os.getenv("FUNCTION_NAME"):
-            return os.getenv("FUNCTION_NAME")[:10]
-        else:
-            internal_debug("Instance ID not found.")
-            return "-"
+        """Retrieves the instance ID based on environment variables, computed once per process."""
+        return _compute_instance_id()
+
+    @staticmethod
+    def refresh_instance_id() -> str:
+        """
+        Recomputes the instance ID, for environments that change its variables after it was first read.
+
+        Returns:
+            str: The recomputed instance ID.
+        """
+        _compute_instance_id.cache_clear()
+        return _compute_instance_id()
 
     @staticmethod
     def get_trace_and_span_ids(trace_header: str = None):
@@ -124,16 +242,7 @@ class GCPLogger:
         Returns:
             tuple: (trace_id, span_id)
         """
-        if trace_header:
-            try:
-                trace_split = trace_header.split("/")
-                span_split = trace_split[1].split(";")
-                return trace_split[0], span_split[0]
-            except IndexError:
-                internal_debug(f"Invalid trace header format: {trace_header}")
-
-        # If no valid trace_header, generate a UUID for trace_id
-        return str(uuid4()), "-"
+        return parse_trace_header(trace_header)
 
     @staticmethod
     def remove_existing_handlers(logger: Optional[logging.Logger] = None):
@@ -160,8 +269,33 @@ class GCPLogger:
         if not self.is_localdev:
             internal_debug("Setting up Cloud Logging handler for production")
             try:
-                self.client = cloud_logging.Client()
-                cloud_handler = CustomCloudLoggingHandler(self.client, default_bucket=self.default_bucket)
+                from .custom_logging_handler import CustomCloudLoggingHandler
+
+                # Reuse the client and uploader if handlers are reconfigured
+                if self.client is None:
+                    self.client = self.get_cloud_logging_client()
+                if self.default_bucket and self.async_uploader is None:
+                    from .async_uploader import AsyncUploader
+
+                    self.async_uploader = AsyncUploader(bucket_name=self.default_bucket)
+                # Unset batching options keep the handler's defaults
+                batch_options = {
+                    key: value
+                    for key, value in (
+                        ("batch_size", self.batch_size),
+                        ("max_latency", self.max_latency),
+                        ("max_queue_size", self.max_queue_size),
+                        ("max_batch_bytes", self.max_batch_bytes),
+                    )
+                    if value is not None
+                }
+                cloud_handler = CustomCloudLoggingHandler(
+                    self.client,
+                    default_bucket=self.default_bucket,
+                    pool_size=self.pool_size,
+                    async_uploader=self.async_uploader,
+                    **batch_options,
+                )
                 self._logger.addHandler(cloud_handler)
                 internal_debug("Cloud Logging handler added successfully")
             except Exception as e:
@@ -173,25 +307,25 @@ class GCPLogger:
             stream_handler.setFormatter(local_formatter)
             self._logger.addHandler(stream_handler)
 
+        # Resolved once here so shutdown() does not probe every handler
+        self._shutdown_handlers = tuple(handler for handler in self._logger.handlers if hasattr(handler, "shutdown"))
         internal_debug(f"Logger configuration complete. Handlers: {len(self._logger.handlers)}")
 
     @staticmethod
     def get_trace_context(trace_header: Optional[str] = None) -> tuple:
         """Default method to extract trace_id and span_id."""
-        if trace_header:
-            try:
-                trace_split = trace_header.split("/")
-                span_split = trace_split[1].split(";")
-                return trace_split[0], span_split[0]
-            except IndexError:
-                internal_debug(f"Invalid trace header format: {trace_header}")
-        return str(uuid4().hex), "-"
+        return parse_trace_header(trace_header)
 
     def update_trace_context(self, trace_header: Optional[str] = None):
-        """Update the logger's trace context."""
-        self._lazy_init()
+        """
+        Update the trace context for the current request.
+
+        The context is stored in a ContextVar, so concurrent requests handled by
+        other threads or asyncio tasks keep their own trace_id and span_id.
+        It only touches the ContextVar, so it runs per request without the initialization check.
+        """
         trace_id, span_id = self.get_trace_context(trace_header)
-        self.logger.extra.update({"trace_id": trace_id, "span_id": span_id})
+        trace_context.set({"trace_id": trace_id, "span_id": span_id})
 
     def get_logger(self) -> logging.Logger:
         """
@@ -206,9 +340,9 @@ class GCPLogger:
 
     def shutdown(self):
         """
-        Shuts down all handlers gracefully.
+        Shuts down the configured handlers gracefully. Runs at process exit unless it was called before.
         """
         self._lazy_init()
-        for handler in self._logger.handlers:
-            if hasattr(handler, "shutdown"):
-                handler.shutdown()
+        atexit.unregister(self.shutdown)
+        for handler in self._shutdown_handlers:
+            handler.shutdown()
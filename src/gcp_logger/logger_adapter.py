@@ -1,10 +1,15 @@
 # File: gcp_logger/logger_adapter.py
 
 import logging
+from contextvars import ContextVar
+from typing import Dict, Optional
 
 from .internal_logger import internal_debug
 from .levels import ALERT, EMERGENCY, NOTICE
 
+# Trace context of the current request; every thread and asyncio task sees its own value
+trace_context: ContextVar[Optional[Dict[str, str]]] = ContextVar("gcp_logger_trace_context", default=None)
+
 
 class GCPLoggerAdapter(logging.LoggerAdapter):
     def process(self, msg, kwargs):
@@ -18,15 +23,27 @@ class GCPLoggerAdapter(logging.LoggerAdapter):
         Returns:
             tuple: The modified log message and keyword arguments.
         """
-        internal_debug(f"Processing log message: {msg}")
-        extra = kwargs.get("extra", {})
-        extra.update(self.extra)
-        kwargs["extra"] = extra
+        # One merge without touching the caller's dict; explicit extras win over the request context
+        caller_extra = kwargs.get("extra")
+        current_trace = trace_context.get()
+        if current_trace:
+            kwargs["extra"] = {**self.extra, **current_trace, **(caller_extra or {})}
+        elif caller_extra:
+            kwargs["extra"] = {**self.extra, **caller_extra}
+        else:
+            # makeRecord only reads extra, so the adapter's own mapping is passed as is
+            kwargs["extra"] = self.extra
         return msg, kwargs
 
     def log(self, level, msg, *args, **kwargs):
-        internal_debug(f"Logging message: level={level}, msg={msg}")
-        super().log(level, msg, *args, **kwargs)
+        # Filtered records skip the debug trace and process() entirely
+        if not self.logger.isEnabledFor(level):
+            return
+        internal_debug("Logging message: level={}, msg={}", level, msg)
+        msg, kwargs = self.process(msg, kwargs)
+        # The level is already checked, so skip Logger.log and its second check. Frames from
+        # this package are skipped by ContextAwareLogger.findCaller, so the caller is unchanged.
+        self.logger._log(level, msg, args, **kwargs)
 
     def notice(self, msg, *args, **kwargs):
         """
@@ -62,4 +79,10 @@ class GCPLoggerAdapter(logging.LoggerAdapter):
         Args:
             msg (str): The log message.
         """
-        self.info(f"SUCCESS: {msg}", *args, **kwargs)
+        if not self.isEnabledFor(logging.INFO):
+            return
+        if args:
+            # msg carries its own placeholders, so the prefix has to be joined up front
+            self.info(f"SUCCESS: {msg}", *args, **kwargs)
+        else:
+            self.info("SUCCESS: %s", msg, **kwargs)
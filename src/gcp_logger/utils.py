@@ -0,0 +1,37 @@
+# File: gcp_logger/utils.py
+
+import os
+from functools import lru_cache
+
+POOL_SIZE_ENV_VAR = "GCP_LOG_POOL_SIZE"
+
+
+def default_pool_size() -> int:
+    """
+    Returns the default number of concurrent Cloud Logging writers.
+
+    A single writer unless GCP_LOG_POOL_SIZE opts into more. Each writer is a thread
+    with its own share of the queue, so more writers only help when one cannot keep up.
+    """
+    value = os.getenv(POOL_SIZE_ENV_VAR)
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            pass
+    return 1
+
+
+@lru_cache(maxsize=1024)
+def get_short_filename(path: str) -> str:
+    """
+    Returns the file name of a path without its directory or extension.
+
+    Args:
+        path (str): The path of the source file.
+
+    Returns:
+        str: The short file name, e.g. "app" for "/srv/app.py".
+    """
+    basename = os.path.basename(path)
+    return basename.rpartition(".")[0] or basename
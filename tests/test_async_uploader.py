@@ -1,10 +1,13 @@
 # File: tests/test_async_uploader.py
 
+import asyncio
+import sys
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.gcp_logger.async_uploader import AsyncUploader
+from src.gcp_logger.async_uploader import AsyncUploader, new_event_loop
 
 
 @pytest.fixture
@@ -35,7 +38,12 @@ async def test_async_upload(async_uploader):
     await async_uploader._async_upload(b"test data", "test_object")
 
     mock_storage_client.upload.assert_called_once_with(
-        bucket="test-bucket", object_name="test_object", file_data=b"test data"
+        bucket="test-bucket",
+        object_name="test_object",
+        file_data=b"test data",
+        content_type="text/plain; charset=utf-8",
+        zipped=True,
+        metadata=None,
     )
 
 
@@ -43,3 +51,34 @@ def test_upload_data(async_uploader):
     with patch.object(async_uploader, "_async_upload") as mock_async_upload:
         async_uploader.upload_data(b"test data", "test_object")
         assert mock_async_upload.called
+
+
+def test_new_event_loop_falls_back_to_asyncio():
+    with patch.dict(sys.modules, {"uvloop": None}):
+        loop = new_event_loop()
+    try:
+        assert isinstance(loop, asyncio.AbstractEventLoop)
+    finally:
+        loop.close()
+
+
+def test_upload_data_refuses_when_too_many_pending(async_uploader):
+    async_uploader.max_pending_uploads = 1
+    async_uploader._pending_uploads.add(MagicMock())
+    with patch.object(async_uploader, "_async_upload") as mock_async_upload:
+        assert async_uploader.upload_data(b"test data", "test_object") is None
+        mock_async_upload.assert_not_called()
+
+
+def test_upload_data_forgets_finished_uploads(async_uploader):
+    with patch.object(async_uploader, "_async_upload") as mock_async_upload:
+        future = async_uploader.upload_data(b"test data", "test_object")
+        future.result(timeout=1)
+        mock_async_upload.assert_called_once()
+
+    # Callbacks run in registration order, so this one fires after the uploader's discard
+    discarded = threading.Event()
+    future.add_done_callback(lambda _: discarded.set())
+    assert discarded.wait(timeout=1)
+    with async_uploader._pending_lock:
+        assert future not in async_uploader._pending_uploads
@@ -0,0 +1,140 @@
+# File: tests/test_batching_transport.py
+
+import logging
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from google.cloud.logging_v2.handlers.transports.background_thread import (
+    _WORKER_TERMINATOR,
+)
+
+from src.gcp_logger.batching_transport import BatchingTransport
+
+
+@pytest.fixture
+def transport():
+    """
+    Fixture to create a BatchingTransport backed by a mocked Cloud Logging client.
+    """
+    mock_client = MagicMock()
+    transport = BatchingTransport(mock_client, "test-log", batch_size=10, max_latency=0.01, max_queue_size=2)
+    yield transport
+    transport.close()
+
+
+def make_record(msg="Test message"):
+    return logging.LogRecord(
+        name="test", level=logging.INFO, pathname="test.py", lineno=1, msg=msg, args=(), exc_info=None
+    )
+
+
+def test_batching_transport_sends_batches(transport):
+    """
+    Test that queued entries are written through a single Cloud Logging batch.
+    """
+    cloud_logger = transport.client.logger.return_value
+    batch = cloud_logger.batch.return_value
+    batch.entries = [object()]
+
+    transport.send(make_record(), "Test message")
+    transport.flush()
+
+    batch.log.assert_called()
+    batch.commit.assert_called()
+
+
+def test_batching_transport_drops_oldest_when_full():
+    """
+    Test that the oldest entries are evicted and counted once the queue is full.
+    """
+    mock_client = MagicMock()
+    transport = BatchingTransport(mock_client, "test-log", max_queue_size=1)
+    # Stop the worker so nothing drains the queue
+    transport.workers[0].stop()
+
+    transport.send(make_record(), "first")
+    transport.send(make_record(), "second")
+
+    assert transport.dropped_count == 1
+    pending = list(transport.workers[0]._queue.queue)
+    assert [entry["message"] for entry in pending] == ["second"]
+
+
+def test_batching_transport_splits_batches_by_size():
+    """
+    Test that a batch is committed early once its messages reach max_batch_bytes.
+    """
+    mock_client = MagicMock()
+    transport = BatchingTransport(mock_client, "test-log", max_batch_bytes=10)
+    worker = transport.workers[0]
+    # Stop the background thread and drain the queue from the test instead
+    worker.stop()
+    batch = mock_client.logger.return_value.batch.return_value
+    batch.entries = [object()]
+
+    for message in ("12345", "67890", "abcde"):
+        transport.send(make_record(), message)
+    worker._queue.put_nowait(_WORKER_TERMINATOR)
+    worker._thread_main()
+
+    assert batch.log.call_count == 3
+    assert batch.commit.call_count == 2
+
+
+def test_batching_transport_counts_utf8_bytes():
+    """
+    Test that non-ASCII messages are measured in UTF-8 bytes, not characters.
+    """
+    mock_client = MagicMock()
+    transport = BatchingTransport(mock_client, "test-log", max_batch_bytes=10)
+    worker = transport.workers[0]
+    worker.stop()
+    batch = mock_client.logger.return_value.batch.return_value
+    batch.entries = [object()]
+
+    # 3 characters but 6 bytes each, so the two cannot share a 10 byte batch
+    for message in ("ééé", "ééé"):
+        transport.send(make_record(), message)
+    worker._queue.put_nowait(_WORKER_TERMINATOR)
+    worker._thread_main()
+
+    assert batch.commit.call_count == 2
+
+
+def test_batching_transport_close_honours_grace_period():
+    """
+    Test that close() returns after the grace period even if a write is stalled.
+    """
+    mock_client = MagicMock()
+    batch = mock_client.logger.return_value.batch.return_value
+    batch.entries = [object()]
+    batch.commit.side_effect = lambda: time.sleep(5)
+    transport = BatchingTransport(mock_client, "test-log", grace_period=0.2, max_latency=0.01)
+
+    transport.send(make_record(), "Test message")
+    start = time.monotonic()
+    transport.close()
+
+    assert time.monotonic() - start < 2
+    # A flush after close() must not wait on the stopped worker either
+    transport.flush()
+
+
+def test_batching_transport_flush_honours_grace_period():
+    """
+    Test that flush() returns after the grace period even if a live worker's write is stalled.
+    """
+    mock_client = MagicMock()
+    batch = mock_client.logger.return_value.batch.return_value
+    batch.entries = [object()]
+    batch.commit.side_effect = lambda: time.sleep(1)
+    transport = BatchingTransport(mock_client, "test-log", grace_period=0.2, max_latency=0.01)
+
+    transport.send(make_record(), "Test message")
+    start = time.monotonic()
+    transport.flush()
+
+    assert time.monotonic() - start < 0.8
+    assert transport.workers[0].is_alive
+    transport.close()
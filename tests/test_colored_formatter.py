@@ -7,9 +7,13 @@ import pytest
 from src.gcp_logger import ColoredFormatter
 
 
+def make_record(msg="Test message", level=logging.INFO, name="test", pathname="test.py"):
+    return logging.LogRecord(name=name, level=level, pathname=pathname, lineno=1, msg=msg, args=(), exc_info=None)
+
+
 @pytest.fixture
 def colored_formatter():
-    return ColoredFormatter()
+    return ColoredFormatter(use_colors=True)
 
 
 def test_colored_formatter_initialization(colored_formatter):
@@ -17,9 +21,32 @@ def test_colored_formatter_initialization(colored_formatter):
 
 
 def test_colored_formatter_format(colored_formatter):
-    record = logging.LogRecord(
-        name="test", level=logging.INFO, pathname="test.py", lineno=1, msg="Test message", args=(), exc_info=None
-    )
+    record = make_record()
     formatted = colored_formatter.format(record)
     assert "Test message" in formatted
     assert "\033[" in formatted  # Check for ANSI color codes
+
+
+def test_colored_formatter_unregistered_level(colored_formatter):
+    record = make_record("Custom level", level=15)
+    formatted = colored_formatter.format(record)
+    assert "Level 15" in formatted
+    assert (15, "Level 15") in colored_formatter._level_styles
+
+
+def test_colored_formatter_without_colors():
+    formatter = ColoredFormatter(use_colors=False)
+    record = make_record()
+    formatted = formatter.format(record)
+    assert "Test message" in formatted
+    assert "\033[" not in formatted
+
+
+@pytest.mark.parametrize("datefmt", [None, "%Y-%m-%d %H:%M:%S"])
+def test_colored_formatter_format_time_matches_logging(datefmt):
+    formatter = ColoredFormatter(use_colors=False)
+    record = make_record()
+    expected = logging.Formatter().formatTime(record, datefmt)
+    assert formatter.formatTime(record, datefmt) == expected
+    # The second call is served from the cached seconds
+    assert formatter.formatTime(record, datefmt) == expected
@@ -1,11 +1,12 @@
 # File: tests/test_context_aware_logger.py
 
 import logging
-from unittest.mock import ANY, MagicMock, call, patch
+import os
+from unittest.mock import MagicMock, call, patch
 
 import pytest
 
-from src.gcp_logger.context_aware_logger import ContextAwareLogger
+from src.gcp_logger.context_aware_logger import _PACKAGE_PREFIX, ContextAwareLogger
 from src.gcp_logger.levels import ALERT, EMERGENCY, NOTICE
 
 
@@ -27,11 +28,10 @@ def test_context_aware_logger_custom_levels(context_aware_logger):
         context_aware_logger.alert("Alert message")
         context_aware_logger.emergency("Emergency message")
 
-        # Define the expected calls including the 'stacklevel' argument
         expected_calls = [
-            call(NOTICE, "Notice message", (), None, ANY, False, 1),
-            call(ALERT, "Alert message", (), None, ANY, False, 1),
-            call(EMERGENCY, "Emergency message", (), None, ANY, False, 1),
+            call(NOTICE, "Notice message", ()),
+            call(ALERT, "Alert message", ()),
+            call(EMERGENCY, "Emergency message", ()),
         ]
 
         # Assert that _log was called with the expected arguments in order
@@ -46,5 +46,78 @@ def test_context_aware_logger_success(context_aware_logger):
     with patch.object(logging.Logger, "info") as mock_info:
         context_aware_logger.success("Success message")
 
-        # Ensure that info was called once with the correctly formatted message
-        mock_info.assert_called_once_with("SUCCESS: Success message")
+        # Ensure that info was called once with the lazily formatted message
+        mock_info.assert_called_once_with("SUCCESS: %s", "Success message")
+
+
+def helper_that_logs(logger):
+    logger.warning("Caller message")
+
+
+def test_context_aware_logger_find_caller():
+    """
+    Test that records report the first caller outside of the logging module and gcp_logger package.
+    """
+    logger = ContextAwareLogger("test_find_caller")
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+
+    helper_that_logs(logger)
+
+    assert records[0].funcName == "helper_that_logs"
+    assert records[0].filename == "test_context_aware_logger.py"
+
+
+def test_context_aware_logger_find_caller_sibling_directory():
+    """
+    Test that frames from a directory sharing the package's name prefix are not skipped.
+    """
+    logger = ContextAwareLogger("test_find_caller_sibling")
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+
+    sibling_file = os.path.join(_PACKAGE_PREFIX.rstrip(os.sep) + "_ext", "module.py")
+    code = compile("def sibling_that_logs(logger):\n    logger.warning('Sibling message')\n", sibling_file, "exec")
+    namespace = {}
+    exec(code, namespace)
+    namespace["sibling_that_logs"](logger)
+
+    assert records[0].pathname == sibling_file
+    assert records[0].funcName == "sibling_that_logs"
+
+
+def test_context_aware_logger_record_defaults(context_aware_logger):
+    """
+    Test that records get default context fields without overriding values passed through extra.
+    """
+    record = context_aware_logger.makeRecord(
+        "test_logger", logging.INFO, "test.py", 1, "Message", (), None, extra={"trace_id": "trace-123"}
+    )
+
+    assert record.trace_id == "trace-123"
+    assert record.span_id == "-"
+    assert record.instance_id == "-"
+
+
+def test_context_aware_logger_success_with_args(context_aware_logger):
+    """
+    Test that success keeps the caller's placeholders working when arguments are passed.
+    """
+    with patch.object(logging.Logger, "info") as mock_info:
+        context_aware_logger.success("Processed %d items", 3)
+
+        mock_info.assert_called_once_with("SUCCESS: Processed %d items", 3)
+
+
+def test_context_aware_logger_log_forwards_stacklevel(context_aware_logger):
+    """
+    Test that log passes stacklevel through to _log.
+    """
+    with patch.object(logging.Logger, "_log") as mock_log:
+        context_aware_logger.log(logging.WARNING, "Warning message", stacklevel=2)
+
+    mock_log.assert_called_once_with(logging.WARNING, "Warning message", (), stacklevel=2)
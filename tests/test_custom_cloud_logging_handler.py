@@ -5,10 +5,16 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 from google.cloud import logging as cloud_logging
+from google.cloud.logging_v2._helpers import LogSeverity
+from google.cloud.logging_v2.handlers.transports.background_thread import _Worker
 
 from src.gcp_logger.custom_logging_handler import CustomCloudLoggingHandler
 
 
+def make_record(msg="Test message", level=logging.INFO, name="test", pathname="test.py"):
+    return logging.LogRecord(name=name, level=level, pathname=pathname, lineno=1, msg=msg, args=(), exc_info=None)
+
+
 @pytest.fixture
 def mock_cloud_logging_client():
     """
@@ -28,7 +34,6 @@ def custom_handler(mock_cloud_logging_client):
     return CustomCloudLoggingHandler(
         mock_cloud_logging_client,
         default_bucket="test-bucket",
-        environment="testing",  # Optional: Provide an environment if needed
     )
 
 
@@ -45,7 +50,7 @@ def test_custom_handler_initialization_no_bucket(mock_cloud_logging_client):
     """
     Test to verify that AsyncUploader is not initialized when no default_bucket is provided.
     """
-    handler = CustomCloudLoggingHandler(mock_cloud_logging_client, default_bucket=None, environment="testing")
+    handler = CustomCloudLoggingHandler(mock_cloud_logging_client, default_bucket=None)
     assert handler.default_bucket is None, "Default bucket should be None."
     assert handler.async_uploader is None, "AsyncUploader should not be initialized when no default_bucket is provided."
 
@@ -53,125 +58,68 @@ def test_custom_handler_initialization_no_bucket(mock_cloud_logging_client):
 def test_custom_handler_emit_info(custom_handler):
     """
     Test the emit method for an INFO level log record.
-    Verifies that the severity is set correctly and that emit calls the parent class's emit method.
+    Verifies that the formatted message, labels and trace context are handed to the transport.
     """
-    with patch.object(CustomCloudLoggingHandler, "add_custom_attributes") as mock_add_attrs, patch.object(
-        CustomCloudLoggingHandler, "format_log_message", return_value="Formatted message"
-    ) as mock_format, patch.object(
-        CustomCloudLoggingHandler, "upload_large_log_to_gcs", return_value=None
-    ) as mock_upload, patch.object(
-        cloud_logging.handlers.CloudLoggingHandler, "emit"
-    ) as mock_parent_emit:
-
-        record = MagicMock(spec=logging.LogRecord)
-        record.levelno = logging.INFO
-        record.getMessage.return_value = "Test message"
-
-        custom_handler.emit(record)
-
-        # Verify severity is set correctly
-        assert record.severity == "INFO", "Severity was not set to 'INFO'."
-
-        # Verify custom attributes are added
-        mock_add_attrs.assert_called_once_with(record)
-
-        # Verify the log message is formatted
-        mock_format.assert_called_once_with(record)
+    custom_handler.transport = MagicMock()
+    custom_handler.async_uploader = MagicMock()
+    record = make_record()
+    record.trace_id = "trace-123"
+    record.span_id = "span-456"
 
-        # Since the message is short, upload_large_log_to_gcs should not be called
-        mock_upload.assert_not_called()
+    custom_handler.emit(record)
 
-        # Verify that the parent emit method was called with the modified record
-        mock_parent_emit.assert_called_once_with(record)
+    custom_handler.transport.send.assert_called_once()
+    args, kwargs = custom_handler.transport.send.call_args
+    assert args == (record, custom_handler.format_log_message(record))
+    assert args[1].endswith(" - Test message")
+    assert record.severity == LogSeverity.INFO, "Severity was not set to INFO."
+    assert kwargs["labels"]["python_logger"] == "test"
+    assert kwargs["trace"] == "trace-123"
+    assert kwargs["span_id"] == "span-456"
+    # Short messages are never uploaded
+    custom_handler.async_uploader.upload_data.assert_not_called()
 
 
 def test_custom_handler_emit_large_log(custom_handler):
     """
     Test the emit method for a log record that exceeds MAX_LOG_SIZE.
-    Verifies that the log is uploaded to GCS and the message is truncated.
+    Verifies that the full log is uploaded to GCS and the sent message is truncated with a reference to it.
     """
-    large_message = "A" * (CustomCloudLoggingHandler.MAX_LOG_SIZE + 1)
-    gcs_uri = "gs://test-bucket/logs/large_log.log"
+    custom_handler.transport = MagicMock()
+    custom_handler.async_uploader = MagicMock()
+    record = make_record("A" * (CustomCloudLoggingHandler.MAX_LOG_SIZE + 1))
 
-    with patch.object(CustomCloudLoggingHandler, "add_custom_attributes") as mock_add_attrs, patch.object(
-        CustomCloudLoggingHandler, "format_log_message", return_value=large_message
-    ) as mock_format, patch.object(
-        CustomCloudLoggingHandler, "upload_large_log_to_gcs", return_value=gcs_uri
-    ) as mock_upload, patch.object(
-        cloud_logging.handlers.CloudLoggingHandler, "emit"
-    ) as mock_parent_emit:
+    custom_handler.emit(record)
 
-        record = MagicMock(spec=logging.LogRecord)
-        record.levelno = logging.INFO
-        record.getMessage.return_value = large_message
+    upload_kwargs = custom_handler.async_uploader.upload_data.call_args.kwargs
+    assert upload_kwargs["data"] == custom_handler.format_log_message(record).encode("utf-8")
 
-        custom_handler.emit(record)
+    args, kwargs = custom_handler.transport.send.call_args
+    message = args[1]
+    assert len(message.encode("utf-8")) <= CustomCloudLoggingHandler.MAX_LOG_SIZE
+    assert CustomCloudLoggingHandler.TRUNCATION_NOTICE in message
+    assert message.endswith(f"Full log at: gs://test-bucket/{upload_kwargs['object_name']}")
+    # Records from plain loggers carry no trace context
+    assert kwargs["trace"] is None
+    assert kwargs["span_id"] is None
 
-        # Verify severity is set correctly
-        assert record.severity == "INFO", "Severity was not set to 'INFO'."
 
-        # Verify custom attributes are added
-        mock_add_attrs.assert_called_once_with(record)
-
-        # Verify the log message is formatted
-        mock_format.assert_called_once_with(record)
-
-        # Verify the large log is uploaded to GCS
-        mock_upload.assert_called_once_with(large_message, record.__dict__)
-
-        # Calculate expected truncated message
-        truncation_notice = "... [truncated]\nMessage has been truncated. Full log at: " + gcs_uri
-        max_truncated_length = CustomCloudLoggingHandler.MAX_LOG_SIZE - len(truncation_notice)
-        truncated_message = large_message[:max_truncated_length]
-
-        expected_truncated_message = f"{truncated_message}{truncation_notice}"
-
-        # Verify that the record's message is truncated and includes the GCS URI
-        assert record.msg == expected_truncated_message, "Log message was not truncated correctly."
-
-        # Verify that the parent emit method was called with the modified record
-        mock_parent_emit.assert_called_once_with(record)
-
-
-def test_custom_handler_emit_without_async_uploader(custom_handler, mock_cloud_logging_client):
+def test_custom_handler_emit_without_async_uploader(mock_cloud_logging_client):
     """
     Test the emit method when AsyncUploader is not initialized (no default_bucket).
-    Ensures that large logs are not uploaded to GCS.
+    Ensures that large logs are sent as they are.
     """
-    # Create a handler without a default_bucket
-    handler = CustomCloudLoggingHandler(mock_cloud_logging_client, default_bucket=None, environment="testing")
-
-    large_message = "A" * (CustomCloudLoggingHandler.MAX_LOG_SIZE + 1)
-
-    with patch.object(handler, "add_custom_attributes") as mock_add_attrs, patch.object(
-        handler, "format_log_message", return_value=large_message
-    ) as mock_format, patch.object(handler, "upload_large_log_to_gcs") as mock_upload, patch.object(
-        cloud_logging.handlers.CloudLoggingHandler, "emit"
-    ) as mock_parent_emit:
-
-        record = MagicMock(spec=logging.LogRecord)
-        record.levelno = logging.INFO
-        record.getMessage.return_value = large_message
+    handler = CustomCloudLoggingHandler(mock_cloud_logging_client, default_bucket=None)
+    handler.transport = MagicMock()
+    record = make_record("A" * (CustomCloudLoggingHandler.MAX_LOG_SIZE + 1))
 
+    with patch.object(handler, "upload_large_log_to_gcs") as mock_upload:
         handler.emit(record)
 
-        # Verify severity is set correctly
-        assert record.severity == "INFO", "Severity was not set to 'INFO'."
-
-        # Verify custom attributes are added
-        mock_add_attrs.assert_called_once_with(record)
-
-        # Verify the log message is formatted
-        mock_format.assert_called_once_with(record)
-
-        # Since AsyncUploader is not initialized, upload_large_log_to_gcs should not be called
-        mock_upload.assert_not_called()
-
-        # Verify that the record's message is still the large message (not truncated)
-        assert record.msg == large_message, "Log message should not be truncated when AsyncUploader is not initialized."
-
-        # Verify that the parent emit method was called with the modified record
-        mock_parent_emit.assert_called_once_with(record)
+    mock_upload.assert_not_called()
+    args, _ = handler.transport.send.call_args
+    assert args[1] == handler.format_log_message(record)
+    assert CustomCloudLoggingHandler.TRUNCATION_NOTICE not in args[1]
 
 
 def test_custom_handler_shutdown(custom_handler):
@@ -187,31 +135,16 @@ def test_custom_handler_add_custom_attributes(custom_handler):
     """
     Test the add_custom_attributes method to ensure that custom attributes are added to the log record.
     """
-    record = MagicMock(spec=logging.LogRecord)
-    record.filename = "test_file.py"
-    record.funcName = "test_function"
-    record.lineno = 42
-
-    # Set initial attributes that might be missing
-    del record.instance_id
-    del record.trace_id
-    del record.span_id
-    del record.custom_filename
-    del record.custom_func
-    del record.custom_lineno
-
-    custom_handler.environment = "testing"
+    record = make_record(level=logging.WARNING, pathname="/srv/app/test_file.py")
 
     custom_handler.add_custom_attributes(record)
 
-    # Verify that custom attributes are set correctly
     assert record.instance_id == "-", "instance_id should default to '-'."
     assert record.trace_id == "-", "trace_id should default to '-'."
     assert record.span_id == "-", "span_id should default to '-'."
-    assert record.environment == "testing", "environment should be set to 'testing'."
-    assert record.filename == "test_file", "filename should be stripped and without extension."
-    assert record.funcName == "test_function", "funcName should be set correctly."
-    assert record.lineno == 42, "lineno should be set correctly."
+    assert record.short_filename == "test_file", "short_filename should be stripped and without extension."
+    assert record.filename == "test_file.py", "filename should be left unchanged."
+    assert record.severity == LogSeverity.WARNING, "severity should match the record level."
 
 
 def test_custom_handler_format_log_message(custom_handler):
@@ -226,7 +159,7 @@ def test_custom_handler_format_log_message(custom_handler):
     record.thread = 5678
     record.levelno = logging.INFO
     record.levelname = "INFO"
-    record.filename = "test_file"
+    record.short_filename = "test_file"
     record.funcName = "test_function"
     record.lineno = 42
     record.getMessage.return_value = "Test log message."
@@ -237,7 +170,7 @@ def test_custom_handler_format_log_message(custom_handler):
         f"{record.instance_id} | {record.trace_id} | {record.span_id} | "
         f"{record.process} | {record.thread} | "
         f"{record.levelname:<8} | "
-        f"{record.filename}:{record.funcName}:{record.lineno} - "
+        f"{record.short_filename}:{record.funcName}:{record.lineno} - "
         f"{record.getMessage.return_value}"
     )
 
@@ -268,3 +201,102 @@ def test_custom_handler_format_log_message(custom_handler):
 #         # Verify that the GCS URI is returned correctly
 #         expected_gcs_uri = f"gs://test-bucket/logs/1234_5678_trace-123_span-456_i-1234567890abcdef0.log"
 #         assert gcs_uri == expected_gcs_uri, "GCS URI was not constructed correctly."
+
+
+def test_truncate_log_message_without_gcs_uri(custom_handler):
+    """
+    Test that a log which was not uploaded is still truncated to the size limit, without a reference.
+    """
+    encoded = b"A" * (CustomCloudLoggingHandler.MAX_LOG_SIZE + 100)
+    truncated = custom_handler.truncate_log_message(encoded, None)
+
+    assert truncated.endswith(CustomCloudLoggingHandler.TRUNCATION_NOTICE)
+    assert "gs://" not in truncated
+    assert len(truncated.encode("utf-8")) == CustomCloudLoggingHandler.MAX_LOG_SIZE
+
+
+def test_generate_blob_name_is_unique(custom_handler):
+    """
+    Test that blob names generated within the same nanosecond still differ.
+    """
+    with patch("src.gcp_logger.custom_logging_handler.time.time_ns", return_value=1700000000000000000):
+        first = custom_handler.generate_blob_name()
+        second = custom_handler.generate_blob_name()
+
+    assert first.startswith("logs/17979cfe362a0000")
+    assert first.endswith(".log")
+    assert first != second
+
+
+def test_upload_large_log_passes_labels_as_metadata(custom_handler):
+    """
+    Test that set labels are stored as object metadata rather than in the blob name.
+    """
+    custom_handler.async_uploader = MagicMock()
+    custom_handler.upload_large_log_to_gcs(b"data", {"instance_id": "inst-1", "trace_id": "-"})
+
+    kwargs = custom_handler.async_uploader.upload_data.call_args.kwargs
+    assert kwargs["metadata"] == {"instance_id": "inst-1"}
+    assert "inst-1" not in kwargs["object_name"]
+
+
+def test_get_entry_labels_is_cached_per_logger(custom_handler):
+    """
+    Test that entry labels carry the logger name and are reused for the same logger.
+    """
+    labels = custom_handler.get_entry_labels("app")
+
+    assert labels["python_logger"] == "app"
+    assert custom_handler._labels_by_logger["app"] is labels
+    assert custom_handler.get_entry_labels("other") is not labels
+
+
+def test_entry_labels_survive_worker_enqueue(custom_handler):
+    """
+    Test that the background worker's python_logger write leaves a cached labels dict unchanged.
+    """
+    labels = custom_handler.get_entry_labels("app")
+    snapshot = dict(labels)
+    worker = _Worker(MagicMock())
+    record = make_record(name="app")
+
+    worker.enqueue(record, "first", labels=labels)
+    worker.enqueue(record, "second", labels=labels)
+
+    assert labels == snapshot
+    assert [entry["labels"] for entry in worker._queue.queue] == [snapshot, snapshot]
+
+
+def test_emit_counts_failures(custom_handler):
+    """
+    Test that emit swallows transport errors, counts them and only reports a sample.
+    """
+    custom_handler.transport = MagicMock()
+    custom_handler.transport.send.side_effect = RuntimeError("unavailable")
+    record = make_record()
+
+    with patch("src.gcp_logger.custom_logging_handler.internal_debug") as mock_debug:
+        for _ in range(3):
+            custom_handler.handle(record)
+
+    assert custom_handler.emit_error_count == 3
+    reports = [call for call in mock_debug.call_args_list if call.args[0].startswith("Error in emit method")]
+    assert len(reports) == 1
+
+
+def test_handle_large_log_stores_record_context_as_metadata(custom_handler):
+    """
+    Test that the record's instance, trace and span ids are stored with the uploaded log.
+    """
+    custom_handler.async_uploader = MagicMock()
+    record = make_record()
+    record.instance_id = "inst-1"
+    record.trace_id = "trace-123"
+    record.span_id = "-"
+    encoded = b"A" * (CustomCloudLoggingHandler.MAX_LOG_SIZE + 1)
+
+    truncated = custom_handler.handle_large_log(record, encoded)
+
+    kwargs = custom_handler.async_uploader.upload_data.call_args.kwargs
+    assert kwargs["metadata"] == {"instance_id": "inst-1", "trace_id": "trace-123"}
+    assert kwargs["object_name"] in truncated
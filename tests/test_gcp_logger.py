@@ -1,36 +1,74 @@
 # File: tests/test_gcp_logger.py
 
-from unittest.mock import patch
+import contextvars
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 from src.gcp_logger import GCPLogger, GCPLoggerAdapter
 from src.gcp_logger.custom_logging_handler import CustomCloudLoggingHandler
+from src.gcp_logger.logger import _compute_instance_id, parse_trace_header
+from src.gcp_logger.logger_adapter import trace_context
 
 
 @pytest.fixture
 def gcp_logger():
-    return GCPLogger(environment="unittest", logger_name="test_logger")
+    """
+    Fixture to create a local development GCPLogger with a mocked Cloud Logging client.
+    Instances created by the test are discarded, so each test starts from a fresh logger.
+    """
+    with (
+        patch.dict(GCPLogger._instances, clear=True),
+        patch.object(GCPLogger, "_default_instance", None),
+        patch.object(GCPLogger, "get_cloud_logging_client", return_value=MagicMock()),
+    ):
+        gcp_logger = GCPLogger(logger_name="test_logger", is_localdev=True)
+        yield gcp_logger
+        gcp_logger.shutdown()
+        gcp_logger.remove_existing_handlers(gcp_logger._logger)
 
 
 def test_gcp_logger_initialization(gcp_logger):
     assert isinstance(gcp_logger.logger, GCPLoggerAdapter)
-    assert gcp_logger.environment == "unittest"
     assert gcp_logger.logger_name == "test_logger"
 
 
+def test_instances_are_cached_per_logger_name(gcp_logger):
+    other = GCPLogger(logger_name="other_logger", is_localdev=True)
+    try:
+        assert GCPLogger(logger_name="test_logger") is gcp_logger
+        assert other is not gcp_logger
+        assert other.logger_name == "other_logger"
+        # Without a name, the first configured instance is returned instead of a new default logger
+        assert GCPLogger() is gcp_logger
+        assert "gcp-logger" not in GCPLogger._instances
+    finally:
+        other.shutdown()
+        other.remove_existing_handlers(other._logger)
+
+
 def test_get_instance_id():
     with patch.dict("os.environ", {"GAE_INSTANCE": "test-instance"}):
-        assert GCPLogger.get_instance_id() == "test-insta"
+        assert GCPLogger.refresh_instance_id() == "test-insta"
 
     with patch.dict("os.environ", {"K_SERVICE": "test-service", "K_REVISION": "rev1"}):
-        assert GCPLogger.get_instance_id() == "test-serv"
+        assert GCPLogger.refresh_instance_id() == "test-serv"
 
     with patch.dict("os.environ", {"FUNCTION_NAME": "test-function"}):
-        assert GCPLogger.get_instance_id() == "test-funct"
+        assert GCPLogger.refresh_instance_id() == "test-funct"
 
     with patch.dict("os.environ", clear=True):
-        assert GCPLogger.get_instance_id() == "-"
+        assert GCPLogger.refresh_instance_id() == "-"
+
+
+def test_get_instance_id_is_cached():
+    with patch.dict("os.environ", {"GAE_INSTANCE": "test-instance"}):
+        assert GCPLogger.refresh_instance_id() == "test-insta"
+
+    with patch.dict("os.environ", {"GAE_INSTANCE": "other-instance"}):
+        assert GCPLogger.get_instance_id() == "test-insta"
+        assert GCPLogger.refresh_instance_id() == "other-inst"
+    _compute_instance_id.cache_clear()
 
 
 def test_get_trace_and_span_ids():
@@ -40,20 +78,80 @@ def test_get_trace_and_span_ids():
     assert span_id == "1"
 
     trace_id, span_id = GCPLogger.get_trace_and_span_ids()
-    assert len(trace_id) == 36  # UUID4 length
+    assert len(trace_id) == 32  # UUID4 hex length
     assert span_id == "-"
 
 
-def test_update_trace_context(gcp_logger):
-    trace_header = "105445aa7843bc8bf206b12000100000/1;o=1"
-    gcp_logger.update_trace_context(trace_header)
-    assert gcp_logger.logger.extra["trace_id"] == "105445aa7843bc8bf206b12000100000"
-    assert gcp_logger.logger.extra["span_id"] == "1"
+def test_parse_trace_header_malformed():
+    for trace_header in ("105445aa7843bc8bf206b12000100000", "105445aa7843bc8bf206b12000100000/;o=1", "/1"):
+        trace_id, span_id = parse_trace_header(trace_header)
+        assert len(trace_id) == 32
+        assert span_id == "-"
 
 
-@patch("google.cloud.logging.Client")
-def test_configure_handlers_production(mock_client, gcp_logger):
-    gcp_logger.environment = "production"
+def test_update_trace_context(gcp_logger):
+    def update_and_process():
+        gcp_logger.update_trace_context("105445aa7843bc8bf206b12000100000/1;o=1")
+        return gcp_logger.logger.process("Test message", {"extra": {"user": "alice"}})
+
+    # Run in a copy of the context so the trace context does not leak into other tests
+    context = contextvars.copy_context()
+    msg, kwargs = context.run(update_and_process)
+
+    assert context[trace_context] == {"trace_id": "105445aa7843bc8bf206b12000100000", "span_id": "1"}
+    assert msg == "Test message"
+    assert kwargs["extra"] == {
+        "instance_id": gcp_logger.instance_id,
+        "trace_id": "105445aa7843bc8bf206b12000100000",
+        "span_id": "1",
+        "user": "alice",
+    }
+    assert trace_context.get() is None
+
+
+def test_update_trace_context_skips_lazy_init(gcp_logger):
+    # Run in a copy of the context so the trace context does not leak into other tests
+    context = contextvars.copy_context()
+    with patch.object(gcp_logger, "_lazy_init") as mock_lazy_init:
+        context.run(gcp_logger.update_trace_context, "105445aa7843bc8bf206b12000100000/1;o=1")
+
+    mock_lazy_init.assert_not_called()
+    assert context[trace_context] == {"trace_id": "105445aa7843bc8bf206b12000100000", "span_id": "1"}
+    assert trace_context.get() is None
+
+
+def test_configure_handlers_production(gcp_logger):
+    gcp_logger.is_localdev = False
     gcp_logger.configure_handlers()
     assert len(gcp_logger._logger.handlers) == 1
     assert isinstance(gcp_logger._logger.handlers[0], CustomCloudLoggingHandler)
+
+
+@patch("google.cloud.logging.Client")
+def test_get_cloud_logging_client_is_shared(mock_client):
+    with patch.object(GCPLogger, "_shared_client", None):
+        first = GCPLogger.get_cloud_logging_client()
+        second = GCPLogger.get_cloud_logging_client()
+
+    assert first is second
+    mock_client.assert_called_once_with()
+
+
+@patch("src.gcp_logger.custom_logging_handler.CustomCloudLoggingHandler")
+def test_configure_handlers_batch_options(mock_handler, gcp_logger):
+    gcp_logger.is_localdev = False
+    gcp_logger.client = object()
+    gcp_logger.batch_size = 1000
+    gcp_logger.max_latency = 0.05
+    gcp_logger.configure_handlers()
+
+    _, kwargs = mock_handler.call_args
+    assert kwargs["batch_size"] == 1000
+    assert kwargs["max_latency"] == 0.05
+    assert "max_queue_size" not in kwargs
+
+
+@patch("src.gcp_logger.logger.atexit")
+def test_shutdown_unregisters_exit_hook(mock_atexit, gcp_logger):
+    gcp_logger.shutdown()
+    mock_atexit.unregister.assert_called_once_with(gcp_logger.shutdown)
@@ -5,6 +5,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from src.gcp_logger import ALERT, EMERGENCY, NOTICE, GCPLoggerAdapter
+from src.gcp_logger.logger_adapter import trace_context
 
 
 @pytest.fixture
@@ -20,6 +21,18 @@ def test_logger_adapter_process(logger_adapter):
     assert kwargs["extra"]["instance_id"] == "test-instance"
 
 
+def test_logger_adapter_process_trace_context(logger_adapter):
+    token = trace_context.set({"trace_id": "trace-123", "span_id": "span-456"})
+    try:
+        _, kwargs = logger_adapter.process("Test message", {})
+    finally:
+        trace_context.reset(token)
+
+    assert kwargs["extra"]["trace_id"] == "trace-123"
+    assert kwargs["extra"]["span_id"] == "span-456"
+    assert kwargs["extra"]["instance_id"] == "test-instance"
+
+
 def test_logger_adapter_custom_levels(logger_adapter):
     with patch.object(logger_adapter, "log") as mock_log:
         logger_adapter.notice("Notice message")
@@ -35,4 +48,42 @@ def test_logger_adapter_custom_levels(logger_adapter):
 def test_logger_adapter_success(logger_adapter):
     with patch.object(logger_adapter, "info") as mock_info:
         logger_adapter.success("Success message")
-        mock_info.assert_called_with("SUCCESS: Success message")
+        mock_info.assert_called_with("SUCCESS: %s", "Success message")
+
+
+def test_logger_adapter_log_skips_disabled_levels(logger_adapter):
+    logger_adapter.logger.isEnabledFor.return_value = False
+    with patch.object(logger_adapter, "process") as mock_process:
+        logger_adapter.log(NOTICE, "Filtered message")
+
+    mock_process.assert_not_called()
+    logger_adapter.logger._log.assert_not_called()
+
+
+def test_logger_adapter_log_calls_logger_directly(logger_adapter):
+    logger_adapter.log(NOTICE, "Notice %s", "message")
+
+    logger_adapter.logger._log.assert_called_once_with(
+        NOTICE, "Notice %s", ("message",), extra={"instance_id": "test-instance"}
+    )
+    logger_adapter.logger.log.assert_not_called()
+
+
+def test_logger_adapter_process_keeps_caller_extra(logger_adapter):
+    caller_extra = {"instance_id": "caller-instance", "user": "alice"}
+    _, kwargs = logger_adapter.process("Test message", {"extra": caller_extra})
+
+    assert kwargs["extra"] == {"instance_id": "caller-instance", "user": "alice"}
+    assert caller_extra == {"instance_id": "caller-instance", "user": "alice"}
+
+
+def test_logger_adapter_process_reuses_extra(logger_adapter):
+    _, kwargs = logger_adapter.process("Test message", {})
+    assert kwargs["extra"] is logger_adapter.extra
+
+
+def test_logger_adapter_log_does_not_format_debug_trace(logger_adapter):
+    msg = MagicMock()
+    with patch("src.gcp_logger.internal_logger.internal_logger.is_debug_enabled", False):
+        logger_adapter.log(NOTICE, msg)
+    msg.__str__.assert_not_called()
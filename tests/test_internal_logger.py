@@ -33,7 +33,30 @@ def test_internal_logger_debug(internal_logger):
         mock_debug.assert_called_with("Test debug message")
 
 
-def test_internal_debug():
+def test_internal_debug(internal_logger):
+    internal_logger.configure(True)
+    try:
+        with patch("src.gcp_logger.internal_logger.internal_logger.debug") as mock_debug:
+            internal_debug("Test debug message")
+            mock_debug.assert_called_with("Test debug message")
+    finally:
+        internal_logger.configure(False)
+
+
+def test_internal_debug_disabled(internal_logger):
+    internal_logger.configure(False)
     with patch("src.gcp_logger.internal_logger.internal_logger.debug") as mock_debug:
         internal_debug("Test debug message")
-        mock_debug.assert_called_with("Test debug message")
+        mock_debug.assert_not_called()
+
+
+def test_internal_logger_debug_writes_to_stderr(internal_logger, capsys):
+    internal_logger.configure(True)
+    try:
+        internal_logger.debug("Value: {}", 42)
+    finally:
+        internal_logger.configure(False)
+
+    err = capsys.readouterr().err
+    assert err.startswith("[")
+    assert err.endswith("] GCPLogger Internal: Value: 42\n")
@@ -0,0 +1,42 @@
+# File: tests/test_utils.py
+
+from unittest.mock import patch
+
+import pytest
+
+from src.gcp_logger.utils import default_pool_size, get_short_filename
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/srv/app/main.py", "main"),
+        ("main.py", "main"),
+        ("/srv/app/module.test.py", "module.test"),
+        ("/srv/app/Makefile", "Makefile"),
+    ],
+)
+def test_get_short_filename(path, expected):
+    """
+    Test that the directory and extension are stripped from source file paths.
+    """
+    assert get_short_filename(path) == expected
+
+
+def test_default_pool_size_from_environment():
+    """
+    Test that GCP_LOG_POOL_SIZE overrides the default pool size and invalid values are ignored.
+    """
+    with patch.dict("os.environ", {"GCP_LOG_POOL_SIZE": "20"}):
+        assert default_pool_size() == 20
+
+    with patch.dict("os.environ", {"GCP_LOG_POOL_SIZE": "many"}):
+        assert default_pool_size() == 1
+
+
+def test_default_pool_size_is_single_writer():
+    """
+    Test that a single writer is used unless a pool is opted into.
+    """
+    with patch.dict("os.environ", clear=True):
+        assert default_pool_size() == 1